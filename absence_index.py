@@ -0,0 +1,146 @@
+from bisect import bisect_right
+
+import numpy as np
+import pandas as pd
+
+from leave_store import LeaveStore, day_ordinal
+
+class AbsenceIndex:
+    """
+    "Who is absent on day X / between X and Y" over the leaves, built once.
+    Leaves are split by team, each team into a segment tree over the days between
+    leave boundaries: a leave is stored in the O(log n) blocks covering it exactly,
+    so the leaves covering X are the rows of the block holding X at every level,
+    all of them hits. Those starting after X, up to Y, are one slice of the leaves
+    sorted by Start. A query costs O(log n + k) for k absences (plus sorting them)
+    instead of a scan of the whole leaves frame; leaves ending before they start
+    cover no day and are never returned.
+    leaves: leaves frame or LeaveStore.
+    """
+    def __init__(self, leaves):
+        if not isinstance(leaves, LeaveStore):
+            leaves = LeaveStore.from_frame(leaves)
+        self.store = leaves
+        team_codes = leaves.codes['Team']
+        self._all = _DayTree(leaves.starts, leaves.ends, np.arange(len(leaves)))
+        self._teams = {}
+        for code, team in enumerate(leaves.values['Team']):
+            rows = np.flatnonzero(team_codes == code)
+            self._teams[team] = _DayTree(leaves.starts[rows], leaves.ends[rows], rows)
+
+    @property
+    def nbytes(self):
+        """
+        Memory held by the buckets (the store is not counted).
+        """
+        return sum(buckets.nbytes for buckets in [self._all, *self._teams.values()])
+
+    @property
+    def teams(self):
+        """
+        Teams of the leaves, in order of first appearance.
+        """
+        return list(self._teams)
+
+    def rows_between(self, start, end, team=None):
+        """
+        Sorted positions, in the store, of the leaves overlapping [start, end]
+        (both included, dates or anything pd.Timestamp accepts), of one team or of all.
+        """
+        first, last = day_ordinal(start), day_ordinal(end)
+        if last < first:
+            raise ValueError(f"End ({end}) is before start ({start})")
+        if team is None:
+            buckets = self._all
+        elif team in self._teams:
+            buckets = self._teams[team]
+        else:
+            return np.empty(0, dtype=np.intp)
+        return buckets.overlapping(first, last)
+
+    def absent_between(self, start, end, team=None):
+        """
+        Leaves (Leave records) overlapping [start, end], in store order.
+        """
+        return [self.store[i] for i in self.rows_between(start, end, team)]
+
+    def absent_on(self, day, team=None):
+        """
+        Leaves (Leave records) covering day, in store order.
+        """
+        return self.absent_between(day, day, team)
+
+    def frame_between(self, start, end, team=None):
+        """
+        Leaves overlapping [start, end] as a process_leave_data frame.
+        """
+        rows = self.rows_between(start, end, team)
+        if not len(rows):
+            return pd.DataFrame([])
+        return pd.DataFrame({
+            "Name": self.store.column('Name')[rows],
+            "Team": self.store.column('Team')[rows],
+            "Start": self.store.dates('Start')[rows],
+            "End": self.store.dates('End')[rows],
+            "Label": self.store.column('Label')[rows],
+        })
+
+class _DayTree:
+    """
+    Leaves of one team in a segment tree over elementary day ranges (between two
+    consecutive distinct Start or End + 1). At each level, the rows stored in every
+    block are contiguous in one array, located by an offsets array.
+    Starts and boundaries are kept as lists as well: bisect on a list is several times
+    faster than np.searchsorted for one scalar, and a query is two or three searches.
+    """
+    __slots__ = ("bounds", "levels", "starts", "start_rows")
+
+    def __init__(self, starts, ends, rows):
+        valid = ends >= starts
+        starts, ends, rows = starts[valid].astype(np.int64), ends[valid].astype(np.int64), rows[valid]
+        order = np.argsort(starts, kind="stable")
+        self.starts = starts[order].tolist()
+        self.start_rows = rows[order]
+
+        bounds = np.unique(np.concatenate([starts, ends + 1]))
+        self.bounds = bounds.tolist()
+        # Half-open elementary ranges [lo, hi) of every leave, split bottom-up into
+        # aligned blocks: the leftmost and rightmost blocks that do not pair up at a level
+        # are stored there, the rest goes up
+        lo, hi = np.searchsorted(bounds, starts), np.searchsorted(bounds, ends + 1)
+        size = max(len(bounds) - 1, 1)
+        self.levels = []
+        while True:
+            left = (lo & 1).astype(bool) & (lo < hi)
+            lo = lo + left
+            right = (hi & 1).astype(bool) & (lo < hi)
+            hi = hi - right
+            blocks = np.concatenate([lo[left] - 1, hi[right]])
+            order = np.argsort(blocks, kind="stable")
+            offsets = np.searchsorted(blocks[order], np.arange(size + 1))
+            self.levels.append((offsets, np.concatenate([rows[left], rows[right]])[order]))
+            if size == 1:
+                break
+            lo, hi, size = lo >> 1, hi >> 1, (size + 1) >> 1
+
+    @property
+    def nbytes(self):
+        return (8 * (len(self.starts) + len(self.bounds)) + self.start_rows.nbytes
+                + sum(offsets.nbytes + rows.nbytes for offsets, rows in self.levels))
+
+    def overlapping(self, first, last):
+        # Leaves covering first: one block per level
+        found = []
+        block = bisect_right(self.bounds, first) - 1
+        if 0 <= block < len(self.bounds) - 1:
+            for offsets, rows in self.levels:
+                if offsets[block] < offsets[block + 1]:
+                    found.append(rows[offsets[block]:offsets[block + 1]])
+                block >>= 1
+        # Leaves starting after first, up to last
+        lo, hi = bisect_right(self.starts, first), bisect_right(self.starts, last)
+        if lo < hi:
+            found.append(self.start_rows[lo:hi])
+        if not found:
+            return np.empty(0, dtype=np.intp)
+        return np.sort(np.concatenate(found))
@@ -1,10 +1,178 @@
-import streamlit as st
-import pandas as pd
+import datetime
 import io
-from parser import load_data, process_leave_data
-from visualizer import create_gantt_chart
-from excel_generator import generate_excel_gantt
-import matplotlib.pyplot as plt
+import os
+import threading
+import uuid
+
+# Headless server: any pyplot use (ours or a library's) must get the Agg backend
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import streamlit as st
+from pipeline_cache import PipelineCache, content_key
+
+# pandas, matplotlib and openpyxl are imported by the functions below, the first
+# time an input is parsed, previewed or exported: the empty page loads without them
+
+# Memory budget of the pipeline cache shared by every session on the server
+PIPELINE_CACHE_BYTES = 256 * 1024 * 1024
+# Worker processes drawing the PDF pages, started once and shared by the sessions
+# (capped to the available CPUs; 1 draws them in the server process)
+PDF_WORKERS = 2
+
+@st.cache_resource
+def get_pipeline_cache():
+    return PipelineCache(max_bytes=PIPELINE_CACHE_BYTES)
+
+@st.cache_resource
+def get_parser_lock():
+    # The pipeline cache is shared by the sessions: one parser update at a time
+    return threading.Lock()
+
+def parse_source(data, filename, all_sheets=False, source=None, session=None):
+    """
+    Raw frame, parsed leaves (LeaveStore) and changes (LeaveDiff, None when the source
+    was not parsed before) of an input, reused as long as its bytes are unchanged.
+    source: identity of the input (Google Sheets URL, or upload name: an edited file
+    usually changes size). session: id of the browser session. The IncrementalParser
+    of each sheet of a source is kept in the pipeline cache as well, counted in its
+    budget, per session: a new version of the same source (uploaded or fetched again
+    with a few cells edited) only parses its new rows, and its changes are against the
+    version this session parsed before it, whatever other users import meanwhile.
+    all_sheets: for Excel files, parse every sheet (leaves tagged with a "Source"
+    column holding the sheet name); the raw frame is then the first sheet.
+    """
+    def compute():
+        from incremental import IncrementalParser, update_sheets
+        from leave_store import LeaveStore
+        from parser import load_data_from_bytes, read_xlsx
+        if all_sheets and filename.endswith(".xlsx"):
+            sheets = read_xlsx(data, sheet_name=None)
+            df_raw = next(iter(sheets.values()))
+        else:
+            df_raw = load_data_from_bytes(data, filename)
+            sheets = {filename: df_raw}
+
+        cache = get_pipeline_cache()
+        parsers_key = ("parsers", content_key(b"", session=session, source=source, all_sheets=all_sheets))
+        with get_parser_lock():
+            parsers = cache.get(parsers_key)
+            first_import = parsers is None
+            if first_import:
+                parsers = {}
+            if all_sheets and filename.endswith(".xlsx"):
+                df_leaves, diff = update_sheets(parsers, sheets)
+            else:
+                df_leaves, diff = parsers.setdefault(filename, IncrementalParser()).update(df_raw)
+            # Put back to be sized again after the update
+            cache.put(parsers_key, parsers)
+        # Kept in the cache as a compact store rather than the leaves frame
+        return df_raw, LeaveStore.from_frame(df_leaves), None if first_import else diff
+
+    # Per session too: the changes depend on what this session imported before
+    key = ("parse", content_key(data, filename=filename, all_sheets=all_sheets, source=source, session=session))
+    return get_pipeline_cache().get_or_compute(key, compute)
+
+def chart_layout(data, filename, df_leaves, render_options, all_sheets=False):
+    """
+    Leave index and paginated chart layout of an input, reused as long as its bytes,
+    parse options and render options are unchanged.
+    render_options: layout_gantt_chart options, plus the max_absent threshold of the
+    conflicts highlighted on the chart (see planning_conflicts).
+    """
+    def compute():
+        from leave_index import build_leave_index
+        from visualizer import layout_gantt_chart
+        layout_options = dict(render_options)
+        conflicts = planning_conflicts(data, filename, df_leaves, layout_options.pop("max_absent"), all_sheets)
+        # Grouped once for the chart, the colors and the Excel export
+        index = build_leave_index(df_leaves)
+        return index, layout_gantt_chart(df_leaves, index=index, conflicts=conflicts, **layout_options)
+
+    key = ("layout", content_key(data, filename=filename, all_sheets=all_sheets, **render_options))
+    return get_pipeline_cache().get_or_compute(key, compute)
+
+def render_preview(layout, page_number):
+    """
+    Screen-resolution PNG of one page, the only drawing done before the page is shown.
+    Keyed on the page content: after an edit of the input, the pages whose rows are
+    unchanged are not drawn again.
+    """
+    from visualizer import page_fingerprint, render_gantt_preview
+
+    def compute():
+        return render_gantt_preview(layout, page_number)
+
+    key = ("preview", page_fingerprint(layout, layout.pages[page_number - 1]))
+    return get_pipeline_cache().get_or_compute(key, compute)
+
+def render_pdf(data, filename, layout, render_options, all_sheets=False):
+    """
+    Full-resolution PDF of every page, only built when the download is requested.
+    The single-page PDFs are cached by page content, so that a new version of the
+    input only draws its changed pages.
+    """
+    def compute():
+        from visualizer import page_fingerprint, render_gantt_pdf
+        cache = get_pipeline_cache()
+        rendered = {}
+        for page in layout.pages:
+            fingerprint = page_fingerprint(layout, page)
+            page_pdf = cache.get(("page_pdf", fingerprint))
+            if page_pdf is not None:
+                rendered[fingerprint] = page_pdf
+        reused = set(rendered)
+        # The other pages in parallel worker processes, merged into one document
+        document = render_gantt_pdf(layout, workers=PDF_WORKERS, rendered=rendered)
+        for fingerprint, page_pdf in rendered.items():
+            if fingerprint not in reused:
+                cache.put(("page_pdf", fingerprint), page_pdf)
+        return document
+
+    key = ("pdf", content_key(data, filename=filename, all_sheets=all_sheets, **render_options))
+    return get_pipeline_cache().get_or_compute(key, compute)
+
+def render_excel(data, filename, df_leaves, index, excel_options, all_sheets=False, max_absent=None):
+    """
+    Excel workbook bytes of an input, only built when the download is requested and
+    reused as long as its bytes, parse options and Excel options are unchanged.
+    max_absent: threshold of the conflicts highlighted in the workbook.
+    """
+    def compute():
+        from excel_generator import write_excel_gantt
+        conflicts = planning_conflicts(data, filename, df_leaves, max_absent, all_sheets)
+        excel_buffer = io.BytesIO()
+        # Streamed with shared styles (xlsxwriter when installed, openpyxl write-only otherwise)
+        write_excel_gantt(df_leaves, excel_buffer, index=index, conflicts=conflicts, **excel_options)
+        return excel_buffer.getvalue()
+
+    key = ("excel", content_key(data, filename=filename, all_sheets=all_sheets, max_absent=max_absent,
+                                **excel_options))
+    return get_pipeline_cache().get_or_compute(key, compute)
+
+def planning_conflicts(data, filename, df_leaves, max_absent, all_sheets=False):
+    """
+    Understaffed periods (more than max_absent people of a team absent at once, not
+    checked when None) and overlapping leaves of one person, found once per input
+    and threshold.
+    """
+    def compute():
+        from conflicts import find_conflicts
+        return find_conflicts(df_leaves, max_absent)
+
+    key = ("conflicts", content_key(data, filename=filename, all_sheets=all_sheets, max_absent=max_absent))
+    return get_pipeline_cache().get_or_compute(key, compute)
+
+def absence_lookup(data, filename, df_leaves, all_sheets=False):
+    """
+    Interval index of the leaves of an input for the "who is absent" queries, built
+    once and reused as long as its bytes and parse options are unchanged.
+    """
+    def compute():
+        from absence_index import AbsenceIndex
+        return AbsenceIndex(df_leaves)
+
+    key = ("absences", content_key(data, filename=filename, all_sheets=all_sheets))
+    return get_pipeline_cache().get_or_compute(key, compute)
 
 st.set_page_config(page_title="Générateur de Planning Congés", layout="wide")
 
@@ -29,69 +197,125 @@ st.sidebar.markdown("---")
 
 input_method = st.sidebar.radio("Choisir la méthode d'import :", ("Fichier (Excel/CSV)", "Lien Google Sheets"))
 
-df_raw = None
+source_data = None
+source_name = None
+source_id = None
+all_sheets = False
 
 try:
     if input_method == "Fichier (Excel/CSV)":
         uploaded_file = st.sidebar.file_uploader("Téléverser un fichier", type=["csv", "xlsx"])
         if uploaded_file:
-            df_raw = load_data(uploaded_file)
+            source_data, source_name = uploaded_file.getvalue(), uploaded_file.name
+            source_id = uploaded_file.name
+            if source_name.endswith(".xlsx"):
+                all_sheets = st.sidebar.checkbox("Importer toutes les feuilles du classeur", value=False)
             
     else:
         sheet_url = st.sidebar.text_input("Coller le lien Google Sheets :", 
                                           placeholder="https://docs.google.com/spreadsheets/...")
         if sheet_url:
-            df_raw = load_data(sheet_url)
+            from parser import fetch_google_sheet
+            source_data, source_name = fetch_google_sheet(sheet_url), "google_sheet.csv"
+            source_id = sheet_url
 
-    if df_raw is not None:
-        st.subheader("Aperçu des Données")
-        st.dataframe(df_raw.head())
-        
+    st.sidebar.markdown("---")
+    max_absent = int(st.sidebar.number_input(
+        "Absents simultanés max par équipe", min_value=0, max_value=500, value=0,
+        help="Au-delà, la période est signalée en rouge sur le planning (0 : pas de contrôle). "
+             "Les congés qui se chevauchent pour une même personne sont toujours signalés.")) or None
+    render_options = {
+        "max_rows_per_page": int(st.sidebar.number_input("Lignes par page (PDF)", min_value=5, max_value=40, value=15)),
+        "max_absent": max_absent,
+    }
+    excel_options = {
+        "conditional": st.sidebar.checkbox(
+            "Excel : couleurs par mise en forme conditionnelle", value=False,
+            help="Fichier plus léger pour les longues périodes : week-ends, équipes et congés "
+                 "sont colorés par des règles de la feuille plutôt que cellule par cellule."),
+        "coverage": st.sidebar.checkbox(
+            "Excel : feuille de couverture par équipe", value=False,
+            help="Ajoute une feuille avec le nombre de personnes absentes par équipe et par jour."),
+    }
+
+    if source_data is not None:
         # Process data
         with st.spinner("Traitement des données..."):
-            df_leaves = process_leave_data(df_raw)
+            df_raw, df_leaves, changes = parse_source(source_data, source_name, all_sheets, source_id,
+                                                      st.session_state.setdefault("session_id", uuid.uuid4().hex))
+
+        st.subheader("Aperçu des Données")
+        st.dataframe(df_raw.head())
+        if "encoding" in df_raw.attrs:
+            st.caption(f"Encodage détecté : {df_raw.attrs['encoding']}")
+        if "Source" in df_leaves.columns:
+            st.caption("Feuilles importées : " + ", ".join(df_leaves.categories("Source")))
+        if changes is not None and any(len(part) for part in changes):
+            st.info(f"Depuis l'import précédent : {len(changes.added)} congé(s) ajouté(s), "
+                    f"{len(changes.removed)} supprimé(s), {len(changes.changed)} modifié(s).")
+            with st.expander("Détail des modifications"):
+                for title, part in (("Ajoutés", changes.added), ("Supprimés", changes.removed),
+                                    ("Modifiés", changes.changed)):
+                    if len(part):
+                        st.caption(title)
+                        st.dataframe(part, hide_index=True)
         
         if not df_leaves.empty:
             st.subheader("Calendrier Généré")
             
-            # Create chart (returns list of figures)
-            figures = create_gantt_chart(df_leaves)
-            
-            # Display first page preview
-            st.pyplot(figures[0])
-            if len(figures) > 1:
-                st.info(f"Le document contient {len(figures)} pages. Prévisualisation de la page 1.")
-            
-            # Save to buffer for download
-            from matplotlib.backends.backend_pdf import PdfPages
-            
-            pdf_buffer = io.BytesIO()
-            with PdfPages(pdf_buffer) as pdf:
-                for fig in figures:
-                    pdf.savefig(fig, bbox_inches='tight')
-                    plt.close(fig) # Close to free memory
-                    
-            pdf_buffer.seek(0)
-            
+            index, layout = chart_layout(source_data, source_name, df_leaves, render_options, all_sheets)
+
+            conflicts = planning_conflicts(source_data, source_name, df_leaves, max_absent, all_sheets)
+            if conflicts.understaffed or conflicts.overlaps:
+                st.warning(f"{len(conflicts.understaffed)} période(s) en sous-effectif, "
+                           f"{len(conflicts.overlaps)} chevauchement(s) de congés (en rouge sur le planning).")
+                with st.expander("Détail des conflits"):
+                    st.dataframe(
+                        [{"Type": "Sous-effectif", "Équipe": c.team, "Nom": None, "Du": c.start, "Au": c.end,
+                          "Absents": c.absent} for c in conflicts.understaffed]
+                        + [{"Type": "Chevauchement", "Équipe": c.team, "Nom": c.name, "Du": c.start, "Au": c.end,
+                            "Absents": None} for c in conflicts.overlaps], hide_index=True)
+
+            page_number = 1
+            if len(layout.pages) > 1:
+                st.info(f"Le document contient {len(layout.pages)} pages.")
+                page_number = int(st.number_input("Page à prévisualiser", min_value=1, max_value=len(layout.pages), value=1))
+
+            # Only the previewed page is drawn here, at screen resolution
+            with st.spinner("Génération de l'aperçu..."):
+                st.image(render_preview(layout, page_number))
+
+            # The print-resolution PDF is rendered when the button is clicked
             st.download_button(
                 label="Télécharger le Planning en PDF",
-                data=pdf_buffer,
+                data=lambda: render_pdf(source_data, source_name, layout, render_options, all_sheets),
                 file_name="planning_conges.pdf",
                 mime="application/pdf"
             )
 
-            # Excel Download
-            excel_wb = generate_excel_gantt(df_leaves)
-            excel_buffer = io.BytesIO()
-            excel_wb.save(excel_buffer)
-            excel_buffer.seek(0)
-            
+            # Excel Download, built on click as well
             st.download_button(
                 label="Télécharger le Planning en Excel",
-                data=excel_buffer,
+                data=lambda: render_excel(source_data, source_name, df_leaves, index, excel_options, all_sheets,
+                                          max_absent),
                 file_name="planning_conges.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
             )
+
+            # Who is absent on a day or over a period, answered from the interval index
+            st.subheader("Qui est absent ?")
+            absences = absence_lookup(source_data, source_name, df_leaves, all_sheets)
+            date_col, team_col = st.columns(2)
+            period = date_col.date_input("Date ou période", value=(datetime.date.today(),), format="DD/MM/YYYY")
+            all_teams = "Toutes les équipes"
+            team = team_col.selectbox("Équipe", [all_teams] + absences.teams)
+            if period:
+                absent = absences.frame_between(period[0], period[-1], None if team == all_teams else team)
+                if absent.empty:
+                    st.success("Personne n'est absent sur cette période.")
+                else:
+                    st.caption(f"{absent['Name'].nunique()} personne(s) absente(s), {len(absent)} congé(s).")
+                    st.dataframe(absent, hide_index=True)
         else:
             st.warning("Aucune donnée de congé valide n'a été trouvée. Vérifiez le format (ex: 'Du 14/05/25 au 17/05/25').")
 
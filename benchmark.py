@@ -0,0 +1,524 @@
+"""
+Performance checks for the rendering pipeline.
+
+    python benchmark.py render [--people 150] [--leaves 15] [--rows 15]
+    python benchmark.py pdf [--people 300] [--workers 1 2 4]
+    python benchmark.py stress [--threads 8]
+    python benchmark.py imports [--repeat 5]
+    python benchmark.py excel [--people 1200] [--conditional]
+    python benchmark.py store [--people 2000]
+    python benchmark.py absences [--people 3000]
+    python benchmark.py coverage [--people 4000] [--extra-days 0]
+    python benchmark.py conflicts [--people 5000] [--max-absent 150]
+    python benchmark.py incremental [--people 2000] [--edits 5]
+    python benchmark.py fetch
+    python benchmark.py parse [--people 500] [--seeds 3]
+"""
+import argparse
+import hashlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_pdf import PdfPages
+
+from excel_generator import excel_writer_engine, write_excel_gantt
+from absence_index import AbsenceIndex
+from conflicts import find_conflicts
+from coverage import team_coverage
+from fetcher import SheetFetcher
+from incremental import IncrementalParser
+from leave_store import LeaveStore
+from parser import load_data, process_leave_data
+from visualizer import (create_gantt_chart, layout_gantt_chart, page_fingerprint, render_gantt_page,
+                        render_gantt_pdf, render_gantt_preview)
+
+# Startup regression targets: the third-party modules each app module cannot avoid
+# importing (its baseline), and the heavy modules its import must not pull in.
+# The cold import time of a module is compared with the cold import time of its
+# baseline measured in the same run, so the check does not depend on the machine.
+IMPORT_TARGETS = {
+    "app": (("streamlit",), ("pandas", "numpy", "matplotlib", "openpyxl", "requests")),
+    "parser": (("pandas",), ("matplotlib", "openpyxl", "requests")),
+    "visualizer": (("pandas", "matplotlib.figure", "matplotlib.collections", "matplotlib.dates",
+                    "matplotlib.backends.backend_agg"), ("matplotlib.pyplot", "openpyxl", "requests")),
+    "excel_generator": (("pandas", "openpyxl"), ("matplotlib", "requests", "xlsxwriter")),
+}
+# Import time a module may add to its baseline, as a fraction of the baseline
+# (0 to 10% measured, the rest is noise between runs)
+IMPORT_OVERHEAD = 0.3
+
+def synthetic_leaves(people=150, leaves_per_person=15, teams=6, seed=0):
+    """
+    Leaves frame shaped like process_leave_data output: ranges of 1 to 15 days and
+    single JS days spread over 14 months, people split evenly across teams.
+    """
+    rng = np.random.default_rng(seed)
+    first_day = np.datetime64("2025-01-01")
+    rows = []
+    for p in range(people):
+        team = f"EQUIPE {p % teams + 1}"
+        starts = first_day + np.sort(rng.integers(0, 425, leaves_per_person)).astype("timedelta64[D]")
+        for start in starts:
+            is_js = rng.random() < 0.3
+            end = start if is_js else start + np.timedelta64(int(rng.integers(0, 15)), "D")
+            start, end = pd.Timestamp(start), pd.Timestamp(end)
+            label = "JS" if is_js else f"{start.strftime('%d/%m')} - {end.strftime('%d/%m')}"
+            rows.append({"Name": f"Personne {p + 1}", "Team": team, "Start": start, "End": end, "Label": label})
+    return pd.DataFrame(rows)
+
+def synthetic_sheet(people=2000, periods=15, teams=20, seed=0):
+    """
+    Raw sheet shaped like the template: a header row per team followed by its people,
+    one period cell per column, a range or a few JS days.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for p in range(people):
+        if p % (people // teams or 1) == 0:
+            rows.append([f"EQUIPE {len(rows) // (people // teams + 1) + 1}"] + [None] * periods)
+        cells = []
+        for day, month, length in zip(rng.integers(1, 21, periods), rng.integers(1, 13, periods), rng.integers(0, 8, periods)):
+            if rng.random() < 0.15:
+                cells.append(f"(+2 JS : {day:02d} et {day + 1:02d}/{month:02d}/26)")
+            else:
+                cells.append(f"Du {day:02d}/{month:02d}/25 au {day + length:02d}/{month:02d}/25")
+        rows.append([f"Personne {p + 1}"] + cells)
+    return pd.DataFrame(rows, columns=["Nom / Equipe"] + [f"Période {i + 1}" for i in range(periods)], dtype=object)
+
+# Cells the two parse engines must read alike: invalid or reversed dates, "inclus",
+# ranges inside the JS parentheses, short and long years, stray values
+EDGE_CELLS = [
+    "Du 31/02/25 au 05/03/25", "du 20/05/25 au 02/05/25 inclus", "DU 1/3/2025 AU 4/3/2025",
+    "(+1 JS : 29/02/24)", "(+2 JS :30/04 et 02/05/26)", "(+3 JS : 3, 4 et 5/06/25)",
+    "(+1 JS : du 01/07/25 au 03/07/25)", "Du 01/09/25 au 05/09/25 (+1 JS : 08/09/25)",
+    "Du 01/10/25 au 03/10/25\nDu 10/10/25 au 12/10/25", "(+1 JS : 45/13/25)", "12", "   ", "Congés",
+]
+
+def edge_case_sheet(people=300, seed=0):
+    """
+    synthetic_sheet with EDGE_CELLS, empty cells and ignored rows spread over it.
+    """
+    rng = np.random.default_rng(seed)
+    df = synthetic_sheet(people, periods=8, teams=5, seed=seed)
+    person_rows = np.flatnonzero(df.iloc[:, 1].notna().to_numpy())
+    for row in rng.choice(person_rows, len(person_rows) // 2, replace=False):
+        df.iat[row, int(rng.integers(1, df.shape[1]))] = rng.choice(EDGE_CELLS + [None])
+    df.iat[int(person_rows[0]), 0] = "SOLDE CONGES"
+    return df
+
+def without_overlaps(df_leaves):
+    """
+    Drops the leaves starting before the end of the previous leave of the same person,
+    which the openpyxl engine of the Excel export cannot merge.
+    """
+    df_leaves = df_leaves.sort_values(["Name", "Start"], kind="stable")
+    latest_end = df_leaves.groupby("Name")["End"].cummax()
+    previous_end = latest_end.groupby(df_leaves["Name"]).shift()
+    return df_leaves[~(df_leaves["Start"] <= previous_end)].sort_index()
+
+def time_render(df_leaves, engine, max_rows_per_page=15):
+    """
+    Builds every page with the given engine and writes them to an in-memory PDF.
+    Returns (pages, build seconds, PDF seconds).
+    """
+    start = time.perf_counter()
+    figures = create_gantt_chart(df_leaves.copy(), max_rows_per_page=max_rows_per_page, engine=engine)
+    built = time.perf_counter()
+    with PdfPages(io.BytesIO()) as pdf:
+        for fig in figures:
+            pdf.savefig(fig, bbox_inches='tight')
+    return len(figures), built - start, time.perf_counter() - built
+
+def run_render(args):
+    df_leaves = synthetic_leaves(args.people, args.leaves)
+    print(f"{len(df_leaves)} leaves, {args.people} people, {args.rows} rows per page")
+    for engine in ("legacy", "batched"):
+        pages, build, pdf = time_render(df_leaves, engine, args.rows)
+        print(f"{engine:>8}: {pages} pages, build {build / pages * 1000:7.1f} ms/page, "
+              f"PDF {pdf / pages * 1000:7.1f} ms/page, total {(build + pdf) / pages * 1000:7.1f} ms/page")
+
+def run_pdf(args):
+    df_leaves = synthetic_leaves(args.people, args.leaves)
+    layout = layout_gantt_chart(df_leaves, max_rows_per_page=args.rows)
+    print(f"{len(df_leaves)} leaves, {len(layout.pages)} pages")
+    digests = set()
+    for workers in args.workers:
+        start = time.perf_counter()
+        pdf = render_gantt_pdf(layout, workers=workers)
+        elapsed = time.perf_counter() - start
+        digests.add(hashlib.sha256(pdf).hexdigest())
+        print(f"{workers:>3} workers: {elapsed:6.2f} s, {len(pdf) // 1024} KB")
+    print("identical bytes:", len(digests) == 1)
+
+def run_excel(args):
+    df_leaves = without_overlaps(synthetic_leaves(args.people, args.leaves))
+    print(f"{len(df_leaves)} leaves, {args.people} people")
+    engines = ["openpyxl", "write_only"]
+    if excel_writer_engine() == "xlsxwriter":
+        engines.append("xlsxwriter")
+    for engine in engines:
+        buffer = io.BytesIO()
+        tracemalloc.start()
+        start = time.perf_counter()
+        write_excel_gantt(df_leaves, buffer, engine=engine, conditional=args.conditional and engine != "openpyxl")
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{engine:>10}: {elapsed:6.2f} s, peak {peak / 2**20:6.1f} MB, {len(buffer.getvalue()) // 1024} KB")
+
+def run_store(args):
+    df_leaves = synthetic_leaves(args.people, args.leaves)
+    start = time.perf_counter()
+    store = LeaveStore.from_frame(df_leaves)
+    elapsed = time.perf_counter() - start
+    frame_bytes = df_leaves.memory_usage(deep=True).sum()
+    print(f"{len(df_leaves)} leaves, {args.people} people, built in {elapsed * 1000:.1f} ms")
+    print(f"frame: {frame_bytes / len(df_leaves):6.1f} bytes/leave")
+    print(f"store: {store.nbytes / len(store):6.1f} bytes/leave ({frame_bytes / store.nbytes:.1f}x smaller)")
+
+def run_absences(args):
+    df_leaves = synthetic_leaves(args.people, args.leaves)
+    start = time.perf_counter()
+    index = AbsenceIndex(df_leaves)
+    elapsed = time.perf_counter() - start
+    print(f"{len(df_leaves)} leaves, {args.people} people, index built in {elapsed * 1000:.1f} ms")
+    rng = np.random.default_rng(0)
+    first_day = df_leaves["Start"].min()
+    days = [first_day + pd.Timedelta(days=int(offset)) for offset in rng.integers(0, 420, args.queries)]
+    team = index.teams[0]
+    for label, width in (("day", 0), ("week", 6)):
+        periods = [(day, day + pd.Timedelta(days=width)) for day in days]
+        for scope in (None, team):
+            start = time.perf_counter()
+            found = sum(len(index.rows_between(first, last, scope)) for first, last in periods)
+            indexed = (time.perf_counter() - start) / len(days)
+            start = time.perf_counter()
+            for first, last in periods[:20]:
+                mask = (df_leaves["Start"] <= last) & (df_leaves["End"] >= first)
+                if scope is not None:
+                    mask &= df_leaves["Team"] == scope
+                df_leaves[mask]
+            scanned = (time.perf_counter() - start) / 20
+            print(f"{label:>4} {scope or 'all teams':>9}: {indexed * 1e6:7.1f} us indexed, "
+                  f"{scanned * 1e6:8.1f} us frame scan, {found / len(days):6.1f} leaves/query")
+
+def run_coverage(args):
+    df_leaves = synthetic_leaves(args.people, args.leaves)
+    # Longer leaves: same number of intervals, many more leave days
+    df_leaves["End"] += pd.Timedelta(days=args.extra_days)
+    leave_days = int(((df_leaves["End"] - df_leaves["Start"]).dt.days + 1).sum())
+    print(f"{len(df_leaves)} leaves, {leave_days} leave days, {args.people} people")
+    start = time.perf_counter()
+    coverage = team_coverage(df_leaves, distinct=False)
+    elapsed = time.perf_counter() - start
+    print(f"difference arrays: {elapsed * 1000:8.1f} ms, {coverage.counts.shape[0]} days x {len(coverage.teams)} teams")
+    if leave_days <= 5_000_000:
+        # Reference: every leave expanded into its days
+        start = time.perf_counter()
+        days = df_leaves.assign(Day=[pd.date_range(s, e) for s, e in zip(df_leaves["Start"], df_leaves["End"])]).explode("Day")
+        expanded = days.groupby(["Day", "Team"]).size()
+        elapsed = time.perf_counter() - start
+        print(f"day expansion:     {elapsed * 1000:8.1f} ms, same counts: {expanded.sum() == coverage.counts.sum()}")
+
+def run_conflicts(args):
+    df_leaves = synthetic_leaves(args.people, args.leaves)
+    print(f"{len(df_leaves)} leaves, {args.people} people, at most {args.max_absent} absent per team")
+    start = time.perf_counter()
+    conflicts = find_conflicts(df_leaves, args.max_absent)
+    elapsed = time.perf_counter() - start
+    print(f"sweep line:    {elapsed * 1000:8.1f} ms, {len(conflicts.understaffed)} understaffed periods, "
+          f"{len(conflicts.overlaps)} overlaps")
+    # Reference: understaffed days from the day x team coverage
+    start = time.perf_counter()
+    coverage = team_coverage(df_leaves)
+    over_days = int((coverage.counts > args.max_absent).sum())
+    elapsed = time.perf_counter() - start
+    swept_days = sum((interval.end - interval.start).days + 1 for interval in conflicts.understaffed)
+    print(f"day coverage:  {elapsed * 1000:8.1f} ms, same understaffed days: {over_days == swept_days}")
+
+def run_incremental(args):
+    df_raw = synthetic_sheet(args.people, args.periods)
+    start = time.perf_counter()
+    process_leave_data(df_raw)
+    full = time.perf_counter() - start
+    parser = IncrementalParser()
+    leaves, _ = parser.update(df_raw)
+    layout = layout_gantt_chart(LeaveStore.from_frame(leaves))
+    print(f"{args.people} people, {len(leaves)} leaves, {len(layout.pages)} pages; full parse: {full * 1000:.1f} ms")
+
+    rng = np.random.default_rng(1)
+    timings = []
+    for _ in range(args.edits):
+        # One new range in one cell of a random person row
+        row = int(rng.integers(0, len(df_raw)))
+        while df_raw.iat[row, 1] is None:
+            row = int(rng.integers(0, len(df_raw)))
+        df_raw = df_raw.copy()
+        day, month = int(rng.integers(1, 21)), int(rng.integers(1, 13))
+        df_raw.iat[row, int(rng.integers(1, df_raw.shape[1]))] = f"Du {day:02d}/{month:02d}/25 au {day + 3:02d}/{month:02d}/25"
+        start = time.perf_counter()
+        leaves, diff = parser.update(df_raw)
+        timings.append(time.perf_counter() - start)
+    same = leaves.equals(process_leave_data(df_raw))
+    print(f"one-cell edit: {np.median(timings) * 1000:.1f} ms median incremental update "
+          f"({parser.parsed_rows} row(s) parsed, {parser.reused_rows} reused), same leaves: {same}")
+    print(f"last diff: {len(diff.added)} added, {len(diff.removed)} removed, {len(diff.changed)} changed")
+
+    # Pages to draw again after the last edits
+    new_layout = layout_gantt_chart(LeaveStore.from_frame(leaves))
+    before = {page_fingerprint(layout, page) for page in layout.pages}
+    changed = [page for page in new_layout.pages if page_fingerprint(new_layout, page) not in before]
+    start = time.perf_counter()
+    for page in changed:
+        render_gantt_preview(new_layout, page.number)
+    elapsed = time.perf_counter() - start
+    print(f"pages to redraw after {args.edits} edits: {len(changed)}/{len(new_layout.pages)}, "
+          f"{elapsed:.1f} s of previews instead of ~{elapsed / max(len(changed), 1) * len(new_layout.pages):.1f} s")
+
+def render_session(seed, people=40):
+    """
+    What one Streamlit session renders for its own input: page 1 as PNG and the whole PDF.
+    """
+    layout = layout_gantt_chart(synthetic_leaves(people, 10, seed=seed))
+    preview = io.BytesIO()
+    render_gantt_page(layout, layout.pages[0]).savefig(preview, format="png", bbox_inches='tight')
+    return preview.getvalue(), render_gantt_pdf(layout, workers=1)
+
+def run_stress(args):
+    # Thread-safety check, not a speed-up: the GIL keeps threaded renders about as
+    # long as sequential ones (render_gantt_pdf's worker processes are the parallel path)
+    seeds = list(range(args.threads))
+    expected = [render_session(seed) for seed in seeds]
+
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        # Several rounds so that renders of different inputs really overlap
+        futures = [executor.submit(render_session, seed) for _ in range(args.rounds) for seed in seeds]
+        results = [future.result() for future in futures]
+
+    # Each render must match the sequential render of the same input, byte for byte
+    mismatches = sum(result != expected[i % len(seeds)] for i, result in enumerate(results))
+    print(f"{len(results)} concurrent renders on {args.threads} threads, "
+          f"compared with sequential renders of the same inputs: {mismatches} mismatches")
+    if mismatches:
+        raise SystemExit(1)
+
+def run_parse(args):
+    here = os.path.dirname(os.path.abspath(__file__))
+    sheets = {name: load_data(os.path.join(here, name)) for name in ("template.csv", "template.xlsx")}
+    for seed in range(args.seeds):
+        sheets[f"synthetic {seed}"] = synthetic_sheet(args.people, seed=seed)
+        sheets[f"edge cases {seed}"] = edge_case_sheet(seed=seed)
+
+    failed = False
+    for name, df in sheets.items():
+        timings = {}
+        results = {}
+        for engine in ("loop", "vectorized"):
+            start = time.perf_counter()
+            results[engine] = process_leave_data(df, engine=engine)
+            timings[engine] = time.perf_counter() - start
+        loop, vectorized = results["loop"], results["vectorized"]
+        same = loop.equals(vectorized) and (loop.dtypes == vectorized.dtypes).all()
+        failed = failed or not same
+        print(f"{name:>14}: {len(loop):6d} leaves, loop {timings['loop'] * 1000:8.1f} ms, "
+              f"vectorized {timings['vectorized'] * 1000:7.1f} ms, {'identical' if same else 'DIFFERENT'}")
+        if not same:
+            print(loop.compare(vectorized) if loop.shape == vectorized.shape else
+                  f"  {loop.shape} vs {vectorized.shape}")
+    if failed:
+        raise SystemExit(1)
+
+class SheetServer(BaseHTTPRequestHandler):
+    """
+    Local stand-in for the Google Sheets CSV export: serves server.body with an ETag,
+    answers 304 to a matching If-None-Match, and counts the requests it receives.
+    """
+    def do_GET(self):
+        self.server.requests += 1
+        etag = '"%s"' % hashlib.sha256(self.server.body).hexdigest()[:16]
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", self.server.content_type)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(self.server.body)))
+        self.end_headers()
+        self.wfile.write(self.server.body)
+
+    def log_message(self, *args):
+        pass
+
+def run_fetch(args):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SheetServer)
+    server.body, server.content_type, server.requests = "Nom,Période\nDupont,Du 01/03/25 au 05/03/25\n".encode("utf-8"), "text/csv; charset=utf-8", 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/export?format=csv"
+    failed = False
+
+    def check(name, fetcher, status, content, requests):
+        nonlocal failed
+        before = server.requests
+        try:
+            result = fetcher.fetch(url)
+            got = (result.status, result.content, server.requests - before)
+        except ValueError as e:
+            got = ("ValueError", None, server.requests - before)
+            if status == "ValueError":
+                print(f"  ({e})")
+        # requests=None: not counted, a background revalidation may or may not have started yet
+        ok = got[:2] == (status, content) and requests in (None, got[2])
+        failed = failed or not ok
+        print(f"{name:>12}: {got[0]}, {got[2]} request(s) {'ok' if ok else f'FAIL, expected {status}'}")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        revalidate = SheetFetcher(cache_dir=cache_dir)
+        first = server.body
+        check("200", revalidate, "downloaded", first, 1)
+        check("304", revalidate, "revalidated", first, 1)
+        check("TTL", SheetFetcher(cache_dir=cache_dir, ttl=60), "fresh", first, 0)
+
+        # The sheet changes: the stale copy is served, the new one is fetched in the background
+        server.body = first + "Martin,Du 10/03/25 au 12/03/25\n".encode("utf-8")
+        stale = SheetFetcher(cache_dir=cache_dir, stale_while_revalidate=True)
+        check("stale", stale, "stale", first, None)
+        deadline = time.time() + 5
+        while stale._revalidating and time.time() < deadline:
+            time.sleep(0.01)
+        check("after stale", SheetFetcher(cache_dir=cache_dir, ttl=60), "fresh", server.body, 0)
+
+        # A sheet that is not shared answers with Google's login page
+        server.body, server.content_type = b"<html>Connexion</html>", "text/html; charset=utf-8"
+        check("HTML", SheetFetcher(cache_dir=cache_dir), "ValueError", None, 1)
+    server.shutdown()
+    if failed:
+        raise SystemExit(1)
+
+def import_profile(*modules):
+    """
+    Cumulative import time of modules in a fresh interpreter (python -X importtime),
+    in ms, and the names of every module their import loaded.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True,
+    )
+    loaded = set()
+    elapsed = 0
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package", the header included;
+        # nested imports are indented below their top-level import
+        if not line.startswith("import time:"):
+            continue
+        _, total, name = line.split("|")
+        if total.strip().isdigit():
+            loaded.add(name.strip())
+            if not name[1:].startswith(" "):
+                elapsed += int(total)
+    return elapsed / 1000, loaded
+
+def run_imports(args):
+    failed = False
+    for module, (baseline, forbidden) in IMPORT_TARGETS.items():
+        try:
+            # Alternated, so that both see the same load of the machine
+            profiles, baselines = zip(*[(import_profile(module), import_profile(*baseline))
+                                        for _ in range(args.repeat)])
+        except subprocess.CalledProcessError:
+            print(f"{module:>16}: not importable here (missing dependency), skipped")
+            continue
+        best = min(ms for ms, _ in profiles)
+        reference = min(ms for ms, _ in baselines)
+        loaded = profiles[0][1]
+        heavy = [name for name in forbidden if name in loaded]
+        status = "ok" if best <= reference * (1 + IMPORT_OVERHEAD) and not heavy else "FAIL"
+        failed = failed or status == "FAIL"
+        print(f"{module:>16}: {best:7.1f} ms, {reference:7.1f} ms for {', '.join(baseline)} "
+              f"({best / reference - 1:+.0%}, at most {IMPORT_OVERHEAD:+.0%}) {status}"
+              + (f", imports {', '.join(heavy)}" if heavy else ""))
+    if failed:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    render = commands.add_parser("render", help="time per page of the legacy and batched chart engines")
+    render.add_argument("--people", type=int, default=150)
+    render.add_argument("--leaves", type=int, default=15, help="leaves per person")
+    render.add_argument("--rows", type=int, default=15, help="rows per page")
+    render.set_defaults(func=run_render)
+
+    pdf = commands.add_parser("pdf", help="parallel PDF rendering time per worker count")
+    pdf.add_argument("--people", type=int, default=300)
+    pdf.add_argument("--leaves", type=int, default=20, help="leaves per person")
+    pdf.add_argument("--rows", type=int, default=15, help="rows per page")
+    pdf.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    pdf.set_defaults(func=run_pdf)
+
+    stress = commands.add_parser("stress", help="thread-safety: concurrent renders of different inputs in threads, checked for cross-talk")
+    stress.add_argument("--threads", type=int, default=8)
+    stress.add_argument("--rounds", type=int, default=2)
+    stress.set_defaults(func=run_stress)
+
+    excel = commands.add_parser("excel", help="Excel export build time and peak memory per engine")
+    excel.add_argument("--people", type=int, default=1200)
+    excel.add_argument("--leaves", type=int, default=15, help="leaves per person")
+    excel.add_argument("--conditional", action="store_true",
+                       help="conditional formatting shading for the streaming engines")
+    excel.set_defaults(func=run_excel)
+
+    store = commands.add_parser("store", help="memory per leave of the leaves frame and of a LeaveStore")
+    store.add_argument("--people", type=int, default=2000)
+    store.add_argument("--leaves", type=int, default=15, help="leaves per person")
+    store.set_defaults(func=run_store)
+
+    absences = commands.add_parser("absences", help="who-is-absent queries: interval index vs frame scan")
+    absences.add_argument("--people", type=int, default=3000)
+    absences.add_argument("--leaves", type=int, default=15, help="leaves per person")
+    absences.add_argument("--queries", type=int, default=2000)
+    absences.set_defaults(func=run_absences)
+
+    coverage = commands.add_parser("coverage", help="day x team absence counts: difference arrays vs day expansion")
+    coverage.add_argument("--people", type=int, default=4000)
+    coverage.add_argument("--leaves", type=int, default=15, help="leaves per person")
+    coverage.add_argument("--extra-days", type=int, default=0, help="days added to every leave")
+    coverage.set_defaults(func=run_coverage)
+
+    conflicts = commands.add_parser("conflicts", help="understaffed periods and overlapping leaves of 75k leaves")
+    conflicts.add_argument("--people", type=int, default=5000)
+    conflicts.add_argument("--leaves", type=int, default=15, help="leaves per person")
+    conflicts.add_argument("--max-absent", type=int, default=150, help="threshold per team")
+    conflicts.set_defaults(func=run_conflicts)
+
+    incremental = commands.add_parser("incremental", help="one-cell edits of a 2,000-person sheet: incremental vs full parse")
+    incremental.add_argument("--people", type=int, default=2000)
+    incremental.add_argument("--periods", type=int, default=15, help="period columns")
+    incremental.add_argument("--edits", type=int, default=5)
+    incremental.set_defaults(func=run_incremental)
+
+    parse = commands.add_parser("parse", help="loop and vectorized parse engines: same leaves, and their times")
+    parse.add_argument("--people", type=int, default=500)
+    parse.add_argument("--seeds", type=int, default=3, help="synthetic sheets of each kind")
+    parse.set_defaults(func=run_parse)
+
+    fetch = commands.add_parser("fetch", help="fetcher against a local HTTP server: 200, 304, TTL, stale copy, HTML page")
+    fetch.set_defaults(func=run_fetch)
+
+    imports = commands.add_parser("imports", help="cold import time of the app modules against their budgets")
+    imports.add_argument("--repeat", type=int, default=5, help="runs per module, the fastest is kept")
+    imports.set_defaults(func=run_imports)
+
+    args = parser.parse_args()
+    args.func(args)
@@ -28,9 +28,10 @@ COLOR_PALETTES = [
     ['#ECEFF1', '#CFD8DC', '#B0BEC5', '#90A4AE', '#78909C', '#607D8B', '#546E7A', '#455A64', '#37474F', '#263238']
 ]
 
-def assign_colors(df_leaves):
+def assign_colors(df_leaves, index=None):
     """
     Assigns colors to people and teams.
+    index: build_leave_index(df_leaves), when the caller already has it.
     Returns (person_color_map, team_color_map)
     
     Logic:
@@ -53,9 +54,12 @@ def assign_colors(df_leaves):
          team_color_map['General'] = palette[1]
          return person_color_map, team_color_map
 
-    teams = df_leaves['Team'].unique()
+    if index is None:
+        from leave_index import build_leave_index
+        index = build_leave_index(df_leaves)
     
-    for team_idx, team in enumerate(teams):
+    for team_idx, team_leaves in enumerate(index):
+        team = team_leaves.team
         # Pick palette for this team (cycle if needed)
         palette = COLOR_PALETTES[team_idx % len(COLOR_PALETTES)]
         
@@ -63,7 +67,7 @@ def assign_colors(df_leaves):
         team_color_map[team] = palette[1] # Index 1 is usually 100 (Light but visible)
         
         # Get people in this team
-        team_people = df_leaves[df_leaves['Team'] == team]['Name'].unique()
+        team_people = [person_leaves.name for person_leaves in team_leaves.people]
         num_people = len(team_people)
         
         if num_people == 0:
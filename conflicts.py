@@ -0,0 +1,110 @@
+from collections import namedtuple
+from datetime import timedelta
+
+import numpy as np
+
+from coverage import person_spans
+from leave_store import EPOCH, LeaveStore
+
+# start / end: datetime.date, end included; absent: most people absent at once
+# over the interval; limit: the team threshold it exceeds
+Understaffing = namedtuple("Understaffing", ["team", "start", "end", "absent", "limit"])
+# Days (start / end included) covered by two leaves of one person; rows: store
+# positions of the earlier leave and of the one overlapping it
+SelfOverlap = namedtuple("SelfOverlap", ["name", "team", "start", "end", "rows"])
+Conflicts = namedtuple("Conflicts", ["understaffed", "overlaps"])
+
+def find_conflicts(leaves, max_absent=None):
+    """
+    Planning conflicts of the leaves (frame or LeaveStore), in O(n log n):
+    - understaffed: every interval where more than max_absent people of a team are
+      absent at once, from one sorted sweep over the team's leave boundaries.
+      max_absent: one threshold for every team, {team: threshold} (teams not listed
+      are not checked), or None to skip the check.
+    - overlaps: leaves of one person overlapping each other, such as a JS day inside
+      a range.
+    Returns Conflicts, each list sorted by team then start.
+    """
+    if not isinstance(leaves, LeaveStore):
+        leaves = LeaveStore.from_frame(leaves)
+    if leaves.empty:
+        return Conflicts([], [])
+
+    # A leave ending before it starts (a typo such as "Du 20/05/25 au 02/05/25") covers
+    # no day, as in team_coverage: in the sweep its -1 would come before its +1
+    valid = np.flatnonzero((leaves.codes['Team'] >= 0) & (leaves.codes['Name'] >= 0) & (leaves.ends >= leaves.starts))
+    team_codes = leaves.codes['Team'][valid].astype(np.int64)
+    person_codes = team_codes * len(leaves.values['Name']) + leaves.codes['Name'][valid]
+    starts = leaves.starts[valid].astype(np.int64)
+    ends = leaves.ends[valid].astype(np.int64)
+
+    understaffed = []
+    if max_absent is not None and len(valid):
+        # A person absent twice on the same day counts once
+        span_teams, span_starts, span_ends = person_spans(person_codes, team_codes, starts, ends)
+        for code, team in enumerate(leaves.values['Team']):
+            limit = max_absent.get(team) if isinstance(max_absent, dict) else max_absent
+            if limit is None:
+                continue
+            in_team = span_teams == code
+            understaffed.extend(_sweep(team, span_starts[in_team], span_ends[in_team], limit))
+
+    overlaps = _self_overlaps(leaves, valid, person_codes, starts, ends)
+    team_order = {team: code for code, team in enumerate(leaves.values['Team'])}
+    overlaps.sort(key=lambda overlap: (team_order[overlap.team], overlap.start))
+    return Conflicts(understaffed, overlaps)
+
+def _sweep(team, starts, ends, limit):
+    """
+    Intervals where more than limit of the given spans are open: +1 at each start,
+    -1 the day after each end, sorted once; the count after the last event of a day
+    holds until the next event day.
+    """
+    if len(starts) <= limit:
+        return []
+    days = np.concatenate([starts, ends + 1])
+    deltas = np.concatenate([np.ones(len(starts), dtype=np.int64), np.full(len(ends), -1, dtype=np.int64)])
+    order = np.argsort(days, kind="stable")
+    days, levels = days[order], np.cumsum(deltas[order])
+    last_of_day = np.append(days[1:] != days[:-1], True)
+    days, levels = days[last_of_day], levels[last_of_day]
+
+    # Segment i: days[i] to days[i + 1] - 1 at levels[i] (the last one is back to 0)
+    over = levels[:-1] > limit
+    edges = np.flatnonzero(np.diff(np.concatenate([[False], over, [False]]).astype(np.int8)))
+    found = []
+    for first, stop in zip(edges[::2].tolist(), edges[1::2].tolist()):
+        found.append(Understaffing(team, _date(days[first]), _date(days[stop] - 1),
+                                   int(levels[first:stop].max()), limit))
+    return found
+
+def _self_overlaps(leaves, valid, person_codes, starts, ends):
+    """
+    Leaves starting before the latest End of the earlier leaves of their person
+    (sorted by person and Start, with a running max of End per person).
+    """
+    order = np.lexsort((starts, person_codes))
+    person_codes, starts, ends, rows = person_codes[order], starts[order], ends[order], valid[order]
+    n = len(starts)
+    if n < 2:
+        return []
+
+    # Running (End, position) max within each person: persons offset apart, the
+    # position in the low digits to know which leave reaches furthest
+    group = np.concatenate([[0], np.cumsum(person_codes[1:] != person_codes[:-1])])
+    offset = ends.max() - starts.min() + 1
+    keys = np.maximum.accumulate(((ends - starts.min()) + group * offset) * n + np.arange(n))
+    reach_pos = keys % n
+    reach = ends[reach_pos]
+
+    same_person = person_codes[1:] == person_codes[:-1]
+    clashes = np.flatnonzero(same_person & (starts[1:] <= reach[:-1])) + 1
+    later_rows = rows[clashes]
+    return [SelfOverlap(name, team, _date(first), _date(last), (earlier, later))
+            for name, team, first, last, earlier, later in zip(
+                leaves.column('Name')[later_rows].tolist(), leaves.column('Team')[later_rows].tolist(),
+                starts[clashes].tolist(), np.minimum(ends[clashes], reach[clashes - 1]).tolist(),
+                rows[reach_pos[clashes - 1]].tolist(), later_rows.tolist())]
+
+def _date(day):
+    return EPOCH + timedelta(days=int(day))
@@ -0,0 +1,73 @@
+from collections import namedtuple
+
+import numpy as np
+
+from leave_store import LeaveStore, day_ordinal
+
+# dates: datetime64[D] per day; teams: in order of first appearance;
+# counts: int32 array (days, teams) of people absent
+TeamCoverage = namedtuple("TeamCoverage", ["dates", "teams", "counts"])
+
+def team_coverage(leaves, start=None, end=None, distinct=True):
+    """
+    Number of people absent per team and per day, from start to end (both included,
+    the leaves' first Start / last End by default).
+    Each leave adds +1 on its first day and -1 after its last in a day x team
+    difference array (a single np.add.at), summed once along the days: the cost
+    grows with the number of leaves and days, not with the leave durations.
+    distinct: overlapping leaves of one person (a JS day inside a range) count once;
+    False counts every leave.
+    leaves: leaves frame or LeaveStore.
+    Returns a TeamCoverage.
+    """
+    if not isinstance(leaves, LeaveStore):
+        leaves = LeaveStore.from_frame(leaves)
+    teams = list(leaves.values['Team'])
+    if leaves.empty and (start is None or end is None):
+        return TeamCoverage(np.empty(0, dtype='datetime64[D]'), teams, np.zeros((0, len(teams)), dtype=np.int32))
+
+    first = day_ordinal(start) if start is not None else int(leaves.starts.min())
+    last = day_ordinal(end) if end is not None else int(leaves.ends.max())
+    total_days = max(last - first + 1, 0)
+
+    # Leaves without a name or team are not counted, as in build_leave_index
+    valid = np.flatnonzero((leaves.codes['Team'] >= 0) & (leaves.codes['Name'] >= 0))
+    team_codes = leaves.codes['Team'][valid].astype(np.int64)
+    name_codes = leaves.codes['Name'][valid].astype(np.int64)
+    starts = leaves.starts[valid].astype(np.int64)
+    ends = leaves.ends[valid].astype(np.int64)
+    if distinct and len(valid):
+        team_codes, starts, ends = person_spans(team_codes * len(leaves.values['Name']) + name_codes,
+                                                 team_codes, starts, ends)
+
+    # Clip to the requested days; leaves entirely outside drop out
+    starts = np.maximum(starts, first) - first
+    ends = np.minimum(ends, last) - first
+    inside = starts <= ends
+    team_codes, starts, ends = team_codes[inside], starts[inside], ends[inside]
+
+    diff = np.zeros((total_days + 1, len(teams)), dtype=np.int32)
+    np.add.at(diff, (np.concatenate([starts, ends + 1]), np.concatenate([team_codes, team_codes])),
+              np.concatenate([np.ones(len(starts), dtype=np.int32), np.full(len(ends), -1, dtype=np.int32)]))
+    counts = np.cumsum(diff[:-1], axis=0, dtype=np.int32)
+    dates = np.arange(first, first + total_days).astype('datetime64[D]')
+    return TeamCoverage(dates, teams, counts)
+
+def person_spans(person_codes, team_codes, starts, ends):
+    """
+    Merges the overlapping leaves of each person (within a team) into spans, with a
+    sort by person and Start and a running max of End: a leave starting after
+    every previous End of its person opens a new span.
+    """
+    order = np.lexsort((starts, person_codes))
+    person_codes, starts, ends, team_codes = person_codes[order], starts[order], ends[order], team_codes[order]
+
+    # Running max of End within each person: offset the persons apart first
+    offset = ends.max() - starts.min() + 1
+    group = np.concatenate([[0], np.cumsum(person_codes[1:] != person_codes[:-1])])
+    reach = np.maximum.accumulate(ends + group * offset) - group * offset
+    opens = np.flatnonzero(np.concatenate([[True], (person_codes[1:] != person_codes[:-1]) | (starts[1:] > reach[:-1])]))
+
+    # A span ends at the reach of its last leave
+    lasts = np.append(opens[1:] - 1, len(starts) - 1)
+    return team_codes[opens], starts[opens], reach[lasts]
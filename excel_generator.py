@@ -1,12 +1,36 @@
+import importlib.util
+from collections import namedtuple
+from copy import copy
+
+import numpy as np
 import pandas as pd
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formatting.rule import ColorScaleRule, FormulaRule
 from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.cell_range import CellRange, MultiCellRange
+from colors import assign_colors
+from leave_index import build_leave_index
+from leave_store import leave_date_bounds
+from coverage import team_coverage
+
+# Conflict highlight (find_conflicts) on the Gantt sheet, and the conflicts sheet
+CONFLICT_FILL = "EF9A9A"
+CONFLICT_FONT = "B71C1C"
+CONFLICTS_SHEET = "Conflits"
+CONFLICTS_HEADER = ("Type", "Équipe", "Nom", "Du", "Au", "Absents", "Limite")
+CONFLICTS_WIDTHS = (16, 25, 25, 12, 12, 9, 9)
+# Coverage sheet: name and heatmap colors (no absence -> most absences)
+COVERAGE_SHEET = "Couverture"
+COVERAGE_LOW = "FFFFFF"
+COVERAGE_HIGH = "F44336"
 
-def generate_excel_gantt(df_leaves):
+def generate_excel_gantt(df_leaves, index=None):
     """
     Generates an Excel file with a Gantt chart layout.
-    df_leaves: DataFrame [Name, Team, Start, End, Label]
+    df_leaves: DataFrame [Name, Team, Start, End, Label], or a LeaveStore
+    index: build_leave_index(df_leaves), when the caller already has it.
     Returns: BytesIO object containing the Excel file.
     """
     if df_leaves.empty:
@@ -17,10 +41,7 @@ def generate_excel_gantt(df_leaves):
     ws.title = "Planning Congés"
 
     # 1. Determine Date Range
-    # Access as .dt accessor if it's a series, but here it's a scalar extraction?
-    # Actually df_leaves['Start'] is a Series.
-    min_date = df_leaves['Start'].min().normalize()
-    max_date = df_leaves['End'].max().normalize()
+    min_date, max_date = (bound.normalize() for bound in leave_date_bounds(df_leaves))
     
     # Add buffer? Maybe not needed for Excel, just exact range or full months.
     # Let's go fully from 1st of min_month to end of max_month for cleaner look.
@@ -32,8 +53,9 @@ def generate_excel_gantt(df_leaves):
 
     # 2. Setup Styles
     # Colors
-    from colors import assign_colors, COLOR_PALETTES
-    person_color_map, team_color_map = assign_colors(df_leaves)
+    if index is None:
+        index = build_leave_index(df_leaves)
+    person_color_map, team_color_map = assign_colors(df_leaves, index=index)
     
     # Clean up hex for OpenPyXL (remove #)
     # Keys are now (Name, Team) tuples
@@ -51,6 +73,17 @@ def generate_excel_gantt(df_leaves):
     
     team_fill = PatternFill(start_color="EEEEEE", end_color="EEEEEE", fill_type="solid")
     team_font = Font(bold=True)
+    name_font = Font(bold=True)
+    center = Alignment(horizontal='center')
+
+    # One fill per color, shared by every team row and leave cell painted with it
+    fills = {}
+
+    def solid(hex_color):
+        fill = fills.get(hex_color)
+        if fill is None:
+            fill = fills[hex_color] = PatternFill(start_color=hex_color, end_color=hex_color, fill_type="solid")
+        return fill
 
     # 3. Draw Header (Timeline)
     # Row 1: Months
@@ -99,20 +132,18 @@ def generate_excel_gantt(df_leaves):
     m_cell.font = header_font
 
     # 4. Draw Rows (Teams & People)
-    # Prepare data structure similar to visualizer
-    teams = df_leaves['Team'].unique()
+    # Same team -> people -> leaves index as the visualizer
     row_idx = 3
     
-    # Map person to color index
-    people_unique = df_leaves['Name'].unique()
     # person_color_map calculated above
 
     date_to_col = {d: i+2 for i, d in enumerate(date_range)}
 
-    for team in teams:
+    for team_leaves in index:
+        team = team_leaves.team
         # Team Header
         team_hex = team_color_map_clean.get(team, "EEEEEE")
-        current_team_fill = PatternFill(start_color=team_hex, end_color=team_hex, fill_type="solid")
+        current_team_fill = solid(team_hex)
         
         t_cell = ws.cell(row=row_idx, column=1, value=team)
         t_cell.fill = current_team_fill
@@ -125,31 +156,28 @@ def generate_excel_gantt(df_leaves):
         ws.merge_cells(start_row=row_idx, start_column=1, end_row=row_idx, end_column=total_days+1)
         # Apply style to merged cells range
         for c in range(1, total_days + 2):
-             ws.cell(row=row_idx, column=c).fill = current_team_fill
-             ws.cell(row=row_idx, column=c).border = border_all
+             team_cell = ws.cell(row=row_idx, column=c)
+             team_cell.fill = current_team_fill
+             team_cell.border = border_all
              
         t_cell.alignment = Alignment(horizontal='left', indent=1)
         
         row_idx += 1
         
-        team_data = df_leaves[df_leaves['Team'] == team]
-        people = team_data['Name'].unique()
-        
-        for person in people:
+        for person_leaves in team_leaves.people:
+            person = person_leaves.name
             # Name
             n_cell = ws.cell(row=row_idx, column=1, value=person)
             n_cell.border = border_all
-            n_cell.font = Font(bold=True)
+            n_cell.font = name_font
             
             # Draw Leaves
-            leaves = team_data[team_data['Name'] == person]
-            
-            for _, leave in leaves.iterrows():
+            for start, end, label in zip(person_leaves.starts, person_leaves.ends, person_leaves.labels):
                 # Find column start/end
                 # We need to handle bounds if leave exceeds date_range (unlikely with our logic but safe to check)
                 # Intersect leave range with chart range
-                l_start = max(leave['Start'].normalize(), start_date)
-                l_end = min(leave['End'].normalize(), end_date)
+                l_start = max(pd.Timestamp(start).normalize(), start_date)
+                l_end = min(pd.Timestamp(end).normalize(), end_date)
                 
                 if l_start > l_end:
                     continue
@@ -166,21 +194,22 @@ def generate_excel_gantt(df_leaves):
 
                 # Style: lookup by (Name, Team) — `team` comes from the outer loop
                 fill_color = person_color_map_clean.get((person, team), 'CCCCCC')
-                fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type="solid")
+                fill = solid(fill_color)
                 
                 # Merge
                 if c_end > c_start:
                     ws.merge_cells(start_row=row_idx, start_column=c_start, end_row=row_idx, end_column=c_end)
                 
                 # Cell Content
-                l_cell = ws.cell(row=row_idx, column=c_start, value=leave['Label'])
+                l_cell = ws.cell(row=row_idx, column=c_start, value=label)
                 l_cell.fill = fill
-                l_cell.alignment = Alignment(horizontal='center')
+                l_cell.alignment = center
                 # Add borders to the merged range? Openpyxl styling on merged cells needs careful handling
                 # Set border for all cells in range
                 for c in range(c_start, c_end + 1):
-                    ws.cell(row=row_idx, column=c).border = border_all
-                    ws.cell(row=row_idx, column=c).fill = fill
+                    leave_cell = ws.cell(row=row_idx, column=c)
+                    leave_cell.border = border_all
+                    leave_cell.fill = fill
             
             # Fill weekends for this row (if no leave)
             # This is expensive visually, maybe minimal is better.
@@ -193,6 +222,511 @@ def generate_excel_gantt(df_leaves):
     
     return wb
 
+def excel_writer_engine():
+    """
+    Fastest engine available for write_excel_gantt: xlsxwriter when it is installed,
+    openpyxl write-only mode otherwise.
+    """
+    if importlib.util.find_spec("xlsxwriter") is not None:
+        return "xlsxwriter"
+    return "write_only"
+
+def write_excel_gantt(df_leaves, target, index=None, engine=None, conditional=False, coverage=False,
+                      conflicts=None):
+    """
+    Writes the Gantt workbook of generate_excel_gantt to target (path or binary file
+    object), streaming the rows with one shared style per distinct format instead of
+    building every styled cell of the sheet in memory.
+    engine: "xlsxwriter", "write_only" (openpyxl write-only mode) or "openpyxl"
+    (generate_excel_gantt then save); defaults to excel_writer_engine().
+    conditional: weekend columns, team bands and leave fills are sheet-level
+    conditional formatting rules (one per color) and the grid cells only hold values,
+    so the file grows with the number of leaves rather than with days x rows.
+    Streaming engines only.
+    coverage: adds a "Couverture" sheet with the number of people absent per team
+    and per day (team_coverage) over the same date columns, as a color-scaled heatmap.
+    conflicts: find_conflicts(df_leaves, ...): the days some team is understaffed (day
+    header), the understaffed teams and the people with overlapping leaves (names)
+    are highlighted in red by one conditional formatting rule, and a "Conflits"
+    sheet lists every conflict.
+    Returns the number of team and person rows written (0, and no file, for no leaves).
+    """
+    if engine is None:
+        engine = excel_writer_engine()
+    if engine not in ("xlsxwriter", "write_only", "openpyxl"):
+        raise ValueError(f"Unknown engine: {engine}")
+    if conditional and engine == "openpyxl":
+        raise ValueError("Conditional formatting needs the xlsxwriter or write_only engine")
+    if df_leaves.empty:
+        return 0
+    if index is None:
+        index = build_leave_index(df_leaves)
+
+    if engine == "openpyxl":
+        wb = generate_excel_gantt(df_leaves, index=index)
+        if coverage or conflicts is not None:
+            grid = _gantt_grid(df_leaves, index)
+        if conflicts is not None:
+            _add_conflict_rule(wb.active, _conflict_ranges(grid, conflicts))
+        if coverage:
+            _add_coverage_sheet(wb, grid, _coverage_table(df_leaves, grid))
+        if conflicts is not None:
+            _add_conflicts_sheet(wb, conflicts)
+        wb.save(target)
+        return sum(1 + len(team_leaves.people) for team_leaves in index)
+
+    grid = _gantt_grid(df_leaves, index)
+    table = _coverage_table(df_leaves, grid) if coverage else None
+    if engine == "xlsxwriter":
+        _write_grid_xlsxwriter(grid, target, conditional, table, conflicts)
+    else:
+        _write_grid_write_only(grid, target, conditional, table, conflicts)
+    return len(grid.rows)
+
+def _conflict_ranges(grid, conflicts):
+    """
+    Gantt sheet cells to highlight for find_conflicts results: day header cells of
+    the understaffed days, label cells of the understaffed teams and name cells of
+    the people with overlapping leaves.
+    """
+    team_rows, person_rows = {}, {}
+    team = None
+    for row_idx, (kind, label, _, _) in enumerate(grid.rows, start=3):
+        if kind == "team":
+            team = label
+            team_rows[team] = row_idx
+        else:
+            person_rows[(label, team)] = row_idx
+
+    first_day = grid.dates[0]
+    ranges = []
+    for interval in conflicts.understaffed:
+        first_col = max((interval.start - first_day).days, 0) + 2
+        last_col = min((interval.end - first_day).days, len(grid.dates) - 1) + 2
+        ranges.append(f"{get_column_letter(first_col)}2:{get_column_letter(last_col)}2")
+    ranges.extend(f"A{team_rows[team]}" for team in dict.fromkeys(interval.team for interval in conflicts.understaffed)
+                  if team in team_rows)
+    ranges.extend(f"A{person_rows[person]}" for person in dict.fromkeys((overlap.name, overlap.team)
+                                                                        for overlap in conflicts.overlaps)
+                  if person in person_rows)
+    return ranges
+
+def _add_conflict_rule(ws, ranges):
+    """
+    Red highlight of the _conflict_ranges cells on an openpyxl Gantt sheet, to be
+    added before the other rules so that it takes precedence.
+    """
+    if ranges:
+        fill = PatternFill(start_color=CONFLICT_FILL, end_color=CONFLICT_FILL, fill_type="solid")
+        ws.conditional_formatting.add(" ".join(ranges), FormulaRule(formula=["TRUE"], fill=fill,
+                                                                     font=Font(bold=True, color=CONFLICT_FONT)))
+
+def _conflict_table(conflicts):
+    """
+    Rows of the "Conflits" sheet: kind, team, name, first day, last day, people
+    absent, threshold.
+    """
+    rows = [("Sous-effectif", interval.team, None, interval.start, interval.end, interval.absent, interval.limit)
+            for interval in conflicts.understaffed]
+    rows.extend(("Chevauchement", overlap.team, overlap.name, overlap.start, overlap.end, None, None)
+                for overlap in conflicts.overlaps)
+    return rows
+
+def _add_conflicts_sheet(wb, conflicts):
+    """
+    "Conflits" sheet for the openpyxl engines (standard or write-only workbook).
+    """
+    ws = wb.create_sheet(CONFLICTS_SHEET)
+    bold = Font(bold=True)
+    for col_idx, width in enumerate(CONFLICTS_WIDTHS, start=1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = width
+    ws.freeze_panes = "A2"
+
+    def cell(value, **attributes):
+        written = WriteOnlyCell(ws, value)
+        for name, attribute in attributes.items():
+            setattr(written, name, attribute)
+        return written
+
+    ws.append([cell(title, font=bold) for title in CONFLICTS_HEADER])
+    for kind, team, name, first, last, absent, limit in _conflict_table(conflicts):
+        ws.append([kind, team, name, cell(first, number_format="DD/MM/YYYY"),
+                   cell(last, number_format="DD/MM/YYYY"), absent, limit])
+
+def _coverage_table(df_leaves, grid):
+    """
+    (label, counts per day column of the grid) of every team, then of all teams.
+    """
+    team_counts = team_coverage(df_leaves, grid.dates[0], grid.dates[-1])
+    table = [(team, team_counts.counts[:, i].tolist()) for i, team in enumerate(team_counts.teams)]
+    table.append(("Total", team_counts.counts.sum(axis=1).tolist()))
+    return table
+
+def _add_coverage_sheet(wb, grid, table):
+    """
+    Coverage heatmap sheet for the openpyxl engines (standard or write-only
+    workbook): values only, days without absences left blank, and the colors given
+    by two color scales (teams, then the total row).
+    """
+    ws = wb.create_sheet(COVERAGE_SHEET)
+    total_days = len(grid.dates)
+    bold = Font(bold=True)
+
+    def cell(value, **attributes):
+        written = WriteOnlyCell(ws, value)
+        for name, attribute in attributes.items():
+            setattr(written, name, attribute)
+        return written
+
+    ws.column_dimensions['A'].width = 25
+    for col_idx in range(2, total_days + 2):
+        ws.column_dimensions[get_column_letter(col_idx)].width = 3
+    ws.freeze_panes = "B3"
+
+    months = [cell("Absents par jour", font=bold)] + [None] * total_days
+    for first_col, _, title in grid.months:
+        months[first_col - 1] = cell(title, font=bold)
+    ws.append(months)
+    ws.append([cell("Équipe / Date", font=bold)] + [date.day for date in grid.dates])
+    for label, counts in table:
+        ws.append([cell(label, font=bold)] + [count or None for count in counts])
+
+    last_day = get_column_letter(total_days + 1)
+    total_row = len(table) + 2
+    for cells in (f"B3:{last_day}{total_row - 1}", f"B{total_row}:{last_day}{total_row}"):
+        ws.conditional_formatting.add(cells, ColorScaleRule(start_type='num', start_value=0, start_color=COVERAGE_LOW,
+                                                            end_type='max', end_color=COVERAGE_HIGH))
+
+# Sheet content of the streaming engines, in 1-based columns (A is the name column).
+# dates: datetime.date per day column; months: (first column, last column, title);
+# weekends: bool per day column;
+# rows: ("team", team, hex color, []) or ("person", name, None, [(first column,
+# last column, label, hex color), ...])
+_GanttGrid = namedtuple("_GanttGrid", ["dates", "weekends", "months", "rows"])
+
+def _gantt_grid(df_leaves, index):
+    """
+    Date columns, months and rows of the Gantt sheet, with the same date range,
+    colors and leave clipping as generate_excel_gantt.
+    """
+    min_date, max_date = (bound.normalize() for bound in leave_date_bounds(df_leaves))
+    start_date = min_date.replace(day=1)
+    end_date = (max_date + pd.DateOffset(months=1)).replace(day=1) - pd.DateOffset(days=1)
+    date_range = pd.date_range(start=start_date, end=end_date)
+    total_days = len(date_range)
+
+    month_firsts = list(np.flatnonzero(date_range.is_month_start)) + [total_days]
+    months = [(first + 2, last + 1, date_range[first].strftime("%B %Y"))
+              for first, last in zip(month_firsts, month_firsts[1:])]
+
+    person_color_map, team_color_map = assign_colors(df_leaves, index=index)
+    first_day = np.datetime64(start_date.date(), 'D')
+
+    rows = []
+    for team_leaves in index:
+        team = team_leaves.team
+        rows.append(("team", team, team_color_map.get(team, "EEEEEE").lstrip('#'), []))
+        for person_leaves in team_leaves.people:
+            color = person_color_map.get((person_leaves.name, team), 'CCCCCC').lstrip('#')
+            # Day columns of the leaves, clipped to the date range
+            firsts = np.maximum((person_leaves.starts.astype('datetime64[D]') - first_day).astype(np.int64), 0) + 2
+            lasts = np.minimum((person_leaves.ends.astype('datetime64[D]') - first_day).astype(np.int64), total_days - 1) + 2
+            leaves = []
+            last_col = 1
+            for first_col, end_col, label in zip(firsts.tolist(), lasts.tolist(), person_leaves.labels):
+                # Overlapping leaves of one person cannot both be merged: the later
+                # one starts after the end of the previous one
+                first_col = max(first_col, last_col + 1)
+                if first_col > end_col:
+                    continue
+                leaves.append((first_col, end_col, label, color))
+                last_col = end_col
+            rows.append(("person", person_leaves.name, None, leaves))
+
+    return _GanttGrid([day.date() for day in date_range], (date_range.weekday >= 5).tolist(), months, rows)
+
+def _write_grid_write_only(grid, target, conditional=False, coverage_table=None, conflicts=None):
+    """
+    openpyxl write-only engine: rows are serialized as they are appended, and each
+    distinct format is registered once then copied onto the cells that use it.
+    conditional, conflicts: see write_excel_gantt; coverage_table: _coverage_table,
+    for the coverage sheet.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Planning Congés")
+    total_days = len(grid.dates)
+
+    border_side = Side(style='thin', color='000000')
+    border_all = Border(left=border_side, right=border_side, top=border_side, bottom=border_side)
+    bold = Font(bold=True)
+    center = Alignment(horizontal='center')
+
+    # The grid never overlaps its merges: they are collected and set once, as
+    # MultiCellRange.add checks each new range against all the previous ones
+    merges = []
+
+    def merge(first_col, last_col, row_idx):
+        merges.append(CellRange(min_col=first_col, min_row=row_idx, max_col=last_col, max_row=row_idx))
+
+    def solid(hex_color):
+        return PatternFill(start_color=hex_color, end_color=hex_color, fill_type="solid")
+
+    formats = {
+        "month": {"fill": solid("4B0082"), "font": Font(color="FFFFFF", bold=True), "alignment": center},
+        "title": {"font": bold},
+        "day": {"alignment": center, "border": border_all},
+        "weekend": {"alignment": center, "border": border_all, "fill": solid("F5F5F5")},
+        "date": {"alignment": center, "border": border_all, "number_format": "d"},
+        "name": {"border": border_all, "font": bold},
+        "label": {"alignment": center},
+        "team_label": {"font": bold, "alignment": Alignment(horizontal='left', indent=1)},
+    }
+    styles = {}
+
+    def cell(value, key, hex_color=None):
+        style = styles.get((key, hex_color))
+        if style is None:
+            if key == "team":
+                attributes = {"fill": solid(hex_color), "font": bold, "border": border_all,
+                              "alignment": Alignment(horizontal='left', indent=1)}
+            elif key == "band":
+                attributes = {"fill": solid(hex_color), "border": border_all}
+            elif key == "leave":
+                attributes = {"fill": solid(hex_color), "border": border_all, "alignment": center}
+            else:
+                attributes = formats[key]
+            template = WriteOnlyCell(ws)
+            for name, attribute in attributes.items():
+                setattr(template, name, attribute)
+            style = styles[(key, hex_color)] = template._style
+        written = WriteOnlyCell(ws, value)
+        written._style = copy(style)
+        return written
+
+    ws.column_dimensions['A'].width = 25
+    for col_idx in range(2, total_days + 2):
+        ws.column_dimensions[get_column_letter(col_idx)].width = 1.5
+    ws.freeze_panes = "B3"
+
+    months = [None] * (total_days + 1)
+    for first_col, last_col, title in grid.months:
+        months[first_col - 1] = cell(title, "month")
+        if last_col > first_col:
+            merge(first_col, last_col, 1)
+    ws.append(months)
+    if conditional:
+        # Dates shown as their day number, so the weekend rule can test them
+        ws.append([cell("Nom / Date", "title")] + [cell(date, "date") for date in grid.dates])
+    else:
+        ws.append([cell("Nom / Date", "title")] + [cell(date.day, "weekend" if weekend else "day")
+                                                      for date, weekend in zip(grid.dates, grid.weekends)])
+
+    # Cell ranges painted by one conditional formatting rule, per fill color
+    painted = {}
+    for row_idx, (kind, label, hex_color, leaves) in enumerate(grid.rows, start=3):
+        if kind == "team":
+            merge(1, total_days + 1, row_idx)
+            if conditional:
+                painted.setdefault(hex_color, []).append(f"A{row_idx}:{get_column_letter(total_days + 1)}{row_idx}")
+                ws.append([cell(label, "team_label")])
+            else:
+                ws.append([cell(label, "team", hex_color)] + [cell(None, "band", hex_color) for _ in range(total_days)])
+            continue
+        values = [cell(label, "name")]
+        for first_col, last_col, leave_label, leave_color in leaves:
+            values.extend([None] * (first_col - 1 - len(values)))
+            if conditional:
+                painted.setdefault(leave_color, []).append(
+                    f"{get_column_letter(first_col)}{row_idx}:{get_column_letter(last_col)}{row_idx}")
+                values.append(cell(leave_label, "label"))
+            else:
+                values.append(cell(leave_label, "leave", leave_color))
+                values.extend(cell(None, "band", leave_color) for _ in range(first_col, last_col))
+            if last_col > first_col:
+                merge(first_col, last_col, row_idx)
+        ws.append(values)
+
+    if conflicts is not None:
+        _add_conflict_rule(ws, _conflict_ranges(grid, conflicts))
+    if conditional:
+        last_day = get_column_letter(total_days + 1)
+        ws.conditional_formatting.add(f"B2:{last_day}2",
+                                      FormulaRule(formula=["WEEKDAY(B$2,2)>5"], fill=solid("F5F5F5")))
+        for hex_color, ranges in painted.items():
+            ws.conditional_formatting.add(" ".join(ranges),
+                                          FormulaRule(formula=["TRUE"], fill=solid(hex_color), border=border_all))
+
+    ws.merged_cells = MultiCellRange(merges)
+    if coverage_table is not None:
+        _add_coverage_sheet(wb, grid, coverage_table)
+    if conflicts is not None:
+        _add_conflicts_sheet(wb, conflicts)
+    wb.save(target)
+
+def _write_grid_xlsxwriter(grid, target, conditional=False, coverage_table=None, conflicts=None):
+    """
+    xlsxwriter engine, in constant memory mode: each row is flushed to disk once the
+    next one starts, and each distinct format is a single shared Format.
+    conditional, conflicts: see write_excel_gantt; coverage_table: _coverage_table,
+    for the coverage sheet (see _add_coverage_sheet).
+    """
+    import xlsxwriter
+    from xlsxwriter.utility import xl_range
+
+    wb = xlsxwriter.Workbook(target, {"constant_memory": True})
+    ws = wb.add_worksheet("Planning Congés")
+    total_days = len(grid.dates)
+
+    border = {"border": 1, "border_color": "#000000"}
+    formats = {
+        "month": {"bg_color": "#4B0082", "pattern": 1, "font_color": "#FFFFFF", "bold": True, "align": "center"},
+        "title": {"bold": True},
+        "day": {"align": "center", **border},
+        "weekend": {"align": "center", "bg_color": "#F5F5F5", "pattern": 1, **border},
+        "date": {"align": "center", "num_format": "d", **border},
+        "name": {"bold": True, **border},
+        "label": {"align": "center"},
+        "team_label": {"bold": True, "align": "left", "indent": 1},
+    }
+    styles = {}
+
+    def style(key, hex_color=None):
+        cell_format = styles.get((key, hex_color))
+        if cell_format is None:
+            if key == "team":
+                properties = {"bg_color": f"#{hex_color}", "pattern": 1, "bold": True, "align": "left", "indent": 1, **border}
+            elif key == "leave":
+                properties = {"bg_color": f"#{hex_color}", "pattern": 1, "align": "center", **border}
+            else:
+                properties = formats[key]
+            cell_format = styles[(key, hex_color)] = wb.add_format(properties)
+        return cell_format
+
+    # Same on-screen widths as the openpyxl engines (25 and 1.5 characters)
+    ws.set_column_pixels(0, 0, _width_pixels(25))
+    ws.set_column_pixels(1, total_days, _width_pixels(1.5))
+    ws.freeze_panes(2, 1)
+
+    for first_col, last_col, title in grid.months:
+        if last_col > first_col:
+            ws.merge_range(0, first_col - 1, 0, last_col - 1, title, style("month"))
+        else:
+            ws.write(0, first_col - 1, title, style("month"))
+    ws.write(1, 0, "Nom / Date", style("title"))
+    for col_idx, (date, weekend) in enumerate(zip(grid.dates, grid.weekends), start=1):
+        if conditional:
+            # Dates shown as their day number, so the weekend rule can test them
+            ws.write_datetime(1, col_idx, date, style("date"))
+        else:
+            ws.write_number(1, col_idx, date.day, style("weekend" if weekend else "day"))
+
+    # Cell ranges painted by one conditional formatting rule, per fill color
+    painted = {}
+
+    def merged_value(row_idx, first_col, last_col, value, cell_format):
+        if last_col == first_col:
+            ws.write(row_idx, first_col - 1, value, cell_format)
+        elif not conditional:
+            ws.merge_range(row_idx, first_col - 1, row_idx, last_col - 1, value, cell_format)
+        else:
+            # Without a format the other cells of the merge are not written at all;
+            # the first one then gets its format
+            ws.merge_range(row_idx, first_col - 1, row_idx, last_col - 1, value, None)
+            ws.write(row_idx, first_col - 1, value, cell_format)
+
+    for row_idx, (kind, label, hex_color, leaves) in enumerate(grid.rows, start=2):
+        if kind == "team":
+            if conditional:
+                painted.setdefault(hex_color, []).append((row_idx, 0, row_idx, total_days))
+                merged_value(row_idx, 1, total_days + 1, label, style("team_label"))
+            else:
+                merged_value(row_idx, 1, total_days + 1, label, style("team", hex_color))
+            continue
+        ws.write(row_idx, 0, label, style("name"))
+        for first_col, last_col, leave_label, leave_color in leaves:
+            if conditional:
+                painted.setdefault(leave_color, []).append((row_idx, first_col - 1, row_idx, last_col - 1))
+                merged_value(row_idx, first_col, last_col, leave_label, style("label"))
+            else:
+                merged_value(row_idx, first_col, last_col, leave_label, style("leave", leave_color))
+
+    # First rule, so that it takes precedence
+    conflict_ranges = _conflict_ranges(grid, conflicts) if conflicts is not None else []
+    if conflict_ranges:
+        ws.conditional_format(conflict_ranges[0], {
+            "type": "formula", "criteria": "=TRUE", "multi_range": " ".join(conflict_ranges),
+            "format": wb.add_format({"bg_color": f"#{CONFLICT_FILL}", "pattern": 1,
+                                     "bold": True, "font_color": f"#{CONFLICT_FONT}"})})
+    if conditional:
+        ws.conditional_format(1, 1, 1, total_days, {
+            "type": "formula", "criteria": "=WEEKDAY(B$2,2)>5",
+            "format": wb.add_format({"bg_color": "#F5F5F5", "pattern": 1})})
+        for hex_color, ranges in painted.items():
+            ws.conditional_format(*ranges[0], {
+                "type": "formula", "criteria": "=TRUE",
+                "multi_range": " ".join(xl_range(*cell_range) for cell_range in ranges),
+                "format": wb.add_format({"bg_color": f"#{hex_color}", "pattern": 1, **border})})
+
+    if coverage_table is not None:
+        _write_coverage_xlsxwriter(wb, grid, coverage_table)
+    if conflicts is not None:
+        _write_conflicts_xlsxwriter(wb, conflicts)
+    wb.close()
+
+def _write_conflicts_xlsxwriter(wb, conflicts):
+    """
+    xlsxwriter version of _add_conflicts_sheet.
+    """
+    ws = wb.add_worksheet(CONFLICTS_SHEET)
+    bold = wb.add_format({"bold": True})
+    day = wb.add_format({"num_format": "dd/mm/yyyy"})
+    for col_idx, width in enumerate(CONFLICTS_WIDTHS):
+        ws.set_column_pixels(col_idx, col_idx, _width_pixels(width))
+    ws.freeze_panes(1, 0)
+
+    ws.write_row(0, 0, CONFLICTS_HEADER, bold)
+    for row_idx, (kind, team, name, first, last, absent, limit) in enumerate(_conflict_table(conflicts), start=1):
+        ws.write_row(row_idx, 0, (kind, team, name))
+        ws.write_datetime(row_idx, 3, first, day)
+        ws.write_datetime(row_idx, 4, last, day)
+        ws.write_row(row_idx, 5, (absent, limit))
+
+def _write_coverage_xlsxwriter(wb, grid, table):
+    """
+    xlsxwriter version of _add_coverage_sheet.
+    """
+    ws = wb.add_worksheet(COVERAGE_SHEET)
+    total_days = len(grid.dates)
+    bold = wb.add_format({"bold": True})
+
+    ws.set_column_pixels(0, 0, _width_pixels(25))
+    ws.set_column_pixels(1, total_days, _width_pixels(3))
+    ws.freeze_panes(2, 1)
+
+    ws.write(0, 0, "Absents par jour", bold)
+    for first_col, _, title in grid.months:
+        ws.write(0, first_col - 1, title, bold)
+    ws.write(1, 0, "Équipe / Date", bold)
+    for col_idx, date in enumerate(grid.dates, start=1):
+        ws.write_number(1, col_idx, date.day)
+    for row_idx, (label, counts) in enumerate(table, start=2):
+        ws.write(row_idx, 0, label, bold)
+        for col_idx, count in enumerate(counts, start=1):
+            if count:
+                ws.write_number(row_idx, col_idx, count)
+
+    total_row = len(table) + 1
+    scale = {"type": "2_color_scale", "min_type": "num", "min_value": 0,
+             "min_color": f"#{COVERAGE_LOW}", "max_color": f"#{COVERAGE_HIGH}"}
+    ws.conditional_format(2, 1, total_row - 1, total_days, scale)
+    ws.conditional_format(total_row, 1, total_row, total_days, scale)
+
+def _width_pixels(width):
+    """
+    On-screen pixels of an openpyxl column width (Calibri 11, 7 px per digit).
+    """
+    return int((256 * width + 128 // 7) / 256 * 7)
+
 if __name__ == "__main__":
     # Test stub
     pass
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (5, 30)
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "planning_conges_http_cache")
+
+# status: "downloaded" (200), "revalidated" (304, disk copy reused),
+# "fresh" (within TTL, no request) or "stale" (served while revalidating in background)
+FetchResult = namedtuple("FetchResult", ["content", "text", "encoding", "status"])
+
+class SheetFetcher:
+    """
+    HTTP fetch layer for sheet exports: one pooled requests.Session, timeouts,
+    and an on-disk copy of every response revalidated with ETag / If-Modified-Since.
+
+    ttl: seconds during which the disk copy is served without any request (0 = always revalidate).
+    stale_while_revalidate: once the TTL has expired, serve the disk copy immediately
+    and revalidate it in a background thread.
+    """
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, timeout=DEFAULT_TIMEOUT, ttl=0,
+                 stale_while_revalidate=False, pool_size=10, retries=2):
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT})
+        retry = Retry(total=retries, backoff_factor=0.3, status_forcelist=[502, 503, 504], allowed_methods=["GET"])
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._revalidating = set()
+
+    def fetch(self, url):
+        """
+        Returns a FetchResult for url, using the disk copy whenever the server
+        (or the TTL) says it is still current.
+        """
+        cached = self._read_cache(url)
+        if cached is not None:
+            meta, content = cached
+            age = time.time() - meta["fetched_at"]
+            if age < self.ttl:
+                return self._result(content, meta, "fresh")
+            if self.stale_while_revalidate:
+                self._revalidate_in_background(url)
+                return self._result(content, meta, "stale")
+
+        return self._download(url, cached)
+
+    def _download(self, url, cached):
+        headers = {}
+        if cached is not None:
+            meta = cached[0]
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+
+        if response.status_code == 304 and cached is not None:
+            meta, content = cached
+            meta["fetched_at"] = time.time()
+            self._write_meta(url, meta)
+            return self._result(content, meta, "revalidated")
+
+        response.raise_for_status()
+
+        # Check if we got a login page (HTML) instead of CSV
+        if "text/html" in response.headers.get("Content-Type", ""):
+            raise ValueError("Google Sheets a demandé une connexion. Veuillez utiliser 'Fichier > Partager > Publier sur le web' et choisir le format CSV.")
+
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            # Same choice as requests' Response.text
+            "encoding": response.encoding or response.apparent_encoding,
+            "fetched_at": time.time(),
+        }
+        self._write_cache(url, meta, response.content)
+        return self._result(response.content, meta, "downloaded")
+
+    def _revalidate_in_background(self, url):
+        with self._lock:
+            if url in self._revalidating:
+                return
+            self._revalidating.add(url)
+
+        def run():
+            try:
+                self._download(url, self._read_cache(url))
+            except Exception:
+                # The stale copy stays in place; the next fetch will try again
+                pass
+            finally:
+                with self._lock:
+                    self._revalidating.discard(url)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _result(self, content, meta, status):
+        encoding = meta.get("encoding") or "utf-8"
+        try:
+            text = str(content, encoding, errors="replace")
+        except LookupError:
+            text = str(content, errors="replace")
+        return FetchResult(content, text, encoding, status)
+
+    # Disk cache: <sha256(url)>.body holds the raw bytes, <sha256(url)>.json the validators
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key + ".json"), os.path.join(self.cache_dir, key + ".body")
+
+    def _read_cache(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                content = f.read()
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url:
+            return None
+        return meta, content
+
+    def _write_cache(self, url, meta, content):
+        _, body_path = self._paths(url)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        _atomic_write(body_path, content)
+        self._write_meta(url, meta)
+
+    def _write_meta(self, url, meta):
+        meta_path, _ = self._paths(url)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        _atomic_write(meta_path, json.dumps(meta).encode("utf-8"))
+
+def _atomic_write(path, data):
+    # Readers in other sessions never see a half-written file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+_default_fetcher = None
+_default_fetcher_lock = threading.Lock()
+
+def get_default_fetcher():
+    """
+    Process-wide SheetFetcher, so that every session shares one connection pool and disk cache.
+    """
+    global _default_fetcher
+    with _default_fetcher_lock:
+        if _default_fetcher is None:
+            _default_fetcher = SheetFetcher()
+        return _default_fetcher
@@ -0,0 +1,302 @@
+import sys
+from collections import Counter, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from parser import _concat_sources, _leaves_of_rows, _merge_js_days_vectorized, _process_leave_data_vectorized, _row_kinds
+
+LEAVE_COLUMNS = ["Name", "Team", "Start", "End", "Label"]
+# added / removed: leaves frames; changed: frame of the leaves whose dates or label
+# moved, with their former Start / End / Label in "Previous Start", "Previous End"
+# and "Previous Label"
+LeaveDiff = namedtuple("LeaveDiff", ["added", "removed", "changed"])
+# What is kept of a raw row: its _row_kinds, and the (first, last + 1) positions of
+# its leaves in the parser pools, other than JS / merged JS days
+_Row = namedtuple("_Row", ["is_person", "is_team", "label", "name", "other", "js"])
+
+class IncrementalParser:
+    """
+    process_leave_data for a sheet uploaded again and again with a few cells edited.
+    Every raw row is keyed on its cells (a tuple, hashed by the row dict): the rows
+    already seen reuse their classification and leaves, JS days already merged, and
+    only the others go through the cell parsers. The teams are then forward-filled
+    over the rows, and the leaves of every row are gathered in the process_leave_data
+    order: update returns exactly the process_leave_data frame.
+    A person listed on two rows of a team (whose JS days merge across the rows) falls
+    back to a full parse.
+    The raw frames are expected to hold text cells, as load_data returns them.
+    """
+    def __init__(self):
+        self.leaves = pd.DataFrame([])
+        self._rows = {} # raw cells -> _Row
+        self._pool = _empty_pools() # (other, js) leave arrays the _Row positions refer to
+        self._people = Counter() # (raw cells, team) of the person rows -> times listed
+        self._names = {} # (raw cells, team) of the person rows -> (name, team)
+        self._year = None
+        self.reused_rows = 0
+        self.parsed_rows = 0
+
+    @property
+    def nbytes(self):
+        """
+        Approximate memory held: the raw cells of the rows kept, the leave pools and
+        the last leaves frame.
+        """
+        size = sys.getsizeof(self._rows) + _sampled_size(list(self._rows), lambda row: sys.getsizeof(row)
+                                                         + sum(map(sys.getsizeof, row)))
+        for pool in self._pool.values():
+            size += sum(values.nbytes for values in pool.values())
+            size += _sampled_size(pool["Label"], sys.getsizeof)
+        if not self.leaves.empty:
+            size += int(self.leaves.memory_usage().sum())
+            for col in ("Name", "Team", "Label"):
+                size += _sampled_size(self.leaves[col].array, sys.getsizeof)
+        return size
+
+    def update(self, df_raw):
+        """
+        Parses a new version of the sheet.
+        Returns (leaves, diff): the process_leave_data frame and its LeaveDiff against
+        the previous update (every leave is added on the first one).
+        """
+        # Cells without a year are read in the current year: a new year starts over
+        year = pd.Timestamp.now().year
+        if year != self._year:
+            self._rows, self._pool, self._year = {}, _empty_pools(), year
+
+        cells = _row_cells(df_raw)
+        new_rows = list(dict.fromkeys(row for row in cells if row not in self._rows))
+        self.parsed_rows, self.reused_rows = len(new_rows), len(cells) - len(new_rows)
+        if new_rows:
+            self._parse(df_raw, cells, new_rows)
+
+        # Rows and leaves of the previous versions are dropped once they outnumber
+        # the current ones
+        live_rows = dict.fromkeys(cells)
+        if len(self._rows) > 2 * len(live_rows):
+            self._compact(live_rows)
+
+        # Team in effect on each person row, as _classify_rows forward-fills it
+        people, team = [], "General"
+        for row in cells:
+            entry = self._rows[row]
+            if entry.is_team:
+                team = entry.label
+            if entry.is_person:
+                people.append((row, team))
+
+        if len(set((self._rows[row].name, team) for row, team in people)) < len(people):
+            leaves = _process_leave_data_vectorized(df_raw)
+        else:
+            leaves = self._gather(people)
+
+        # People of the rows added, removed, or listed a different number of times
+        current = Counter(people)
+        names = {person: (self._rows[person[0]].name, person[1]) for person in current}
+        touched = {names.get(person) or self._names[person]
+                   for person in current.keys() | self._people.keys() if current[person] != self._people[person]}
+        previous, self.leaves, self._people, self._names = self.leaves, leaves, current, names
+        return leaves, diff_leaves(previous, leaves, touched)
+
+    def _parse(self, df_raw, cells, new_rows):
+        """
+        Classifies and parses the rows seen for the first time, appending their
+        leaves to the pools.
+        """
+        first_seen = {}
+        for position, row in enumerate(cells):
+            first_seen.setdefault(row, position)
+        df_new = df_raw.iloc[[first_seen[row] for row in new_rows]]
+        is_person, is_team, labels, names = _row_kinds(df_new)
+
+        # Each new row is its own team here, so that JS days only merge within a row
+        leaves, _ = _leaves_of_rows(df_new, np.flatnonzero(is_person), names, np.arange(len(new_rows)))
+        if leaves.empty:
+            leaves = _empty_leaves()
+        # _merge_js_days_vectorized puts the other leaves first, in row order, then the
+        # merged JS days sorted by name, row and Start
+        other_count = int((leaves['Label'] != 'JS').sum())
+        leaves = _merge_js_days_vectorized(leaves)
+        is_js = np.arange(len(leaves)) >= other_count
+        row_of = leaves['Team'].to_numpy(dtype=np.int64)
+
+        spans = {}
+        for kind, mask in (("other", ~is_js), ("js", is_js)):
+            part = leaves[mask]
+            order = np.argsort(row_of[mask], kind="stable")
+            part_rows = row_of[mask][order]
+            offset = len(self._pool[kind]["Start"])
+            firsts = np.searchsorted(part_rows, np.arange(len(new_rows)), side="left") + offset
+            lasts = np.searchsorted(part_rows, np.arange(len(new_rows)), side="right") + offset
+            spans[kind] = (firsts.tolist(), lasts.tolist())
+            self._pool[kind] = {col: np.concatenate([self._pool[kind][col], part[col].to_numpy()[order]])
+                                for col in ("Start", "End", "Label")}
+
+        for i, row in enumerate(new_rows):
+            self._rows[row] = _Row(bool(is_person[i]), bool(is_team[i]), labels[i], names[i],
+                                   (spans["other"][0][i], spans["other"][1][i]),
+                                   (spans["js"][0][i], spans["js"][1][i]))
+
+    def _compact(self, rows):
+        """
+        Keeps the given rows only, and their leaves only in the pools.
+        """
+        kept = {}
+        pool = {}
+        for kind in ("other", "js"):
+            spans = np.array([getattr(self._rows[row], kind) for row in rows], dtype=np.intp).reshape(-1, 2)
+            positions, firsts = _ranges(spans)
+            pool[kind] = {col: values[positions] for col, values in self._pool[kind].items()}
+            kept[kind] = zip(firsts.tolist(), (firsts + spans[:, 1] - spans[:, 0]).tolist())
+        self._rows = {row: self._rows[row]._replace(other=other, js=js)
+                      for row, other, js in zip(rows, kept["other"], kept["js"])}
+        self._pool = pool
+
+    def _gather(self, people):
+        """
+        process_leave_data frame of the person rows ((raw cells, team) pairs): the
+        other leaves in row order, then the merged JS days by name and team.
+        """
+        entries = [self._rows[row] for row, _ in people]
+        names = np.array([entry.name for entry in entries] + [None], dtype=object)[:-1]
+        teams = np.array([team for _, team in people] + [None], dtype=object)[:-1]
+        js_order = sorted((i for i, entry in enumerate(entries) if entry.js[1] > entry.js[0]),
+                          key=lambda i: (names[i], teams[i]))
+
+        parts = []
+        for kind, order in (("other", np.arange(len(entries))), ("js", np.array(js_order, dtype=np.intp))):
+            spans = np.array([getattr(entries[i], kind) for i in order.tolist()], dtype=np.intp).reshape(-1, 2)
+            positions, _ = _ranges(spans)
+            counts = spans[:, 1] - spans[:, 0]
+            pool = self._pool[kind]
+            parts.append({
+                "Name": np.repeat(names[order], counts),
+                "Team": np.repeat(teams[order], counts),
+                "Start": pool["Start"][positions],
+                "End": pool["End"][positions],
+                "Label": pool["Label"][positions],
+            })
+        if not sum(len(part["Start"]) for part in parts):
+            return pd.DataFrame([])
+        return pd.DataFrame({col: np.concatenate([part[col] for part in parts]) for col in LEAVE_COLUMNS})
+
+def update_sheets(parsers, frames):
+    """
+    Incremental process_excel_sheets: frames is {sheet name: raw frame} and parsers
+    {sheet name: IncrementalParser}, completed for new sheets (the caller keeps it
+    between updates). Sheets no longer in frames are dropped from parsers, their
+    leaves reported as removed.
+    Returns (leaves, diff), with the "Source" column of process_excel_sheets.
+    """
+    results, diffs = [], []
+    for name in [name for name in parsers if name not in frames]:
+        # Every leave of a dropped sheet is removed
+        diffs.append((name, diff_leaves(parsers.pop(name).leaves, pd.DataFrame([]))))
+    for name, df_raw in frames.items():
+        leaves, diff = parsers.setdefault(name, IncrementalParser()).update(df_raw)
+        results.append((name, leaves))
+        diffs.append((name, diff))
+    return _concat_sources(results), LeaveDiff(*(_concat_sources([(name, getattr(diff, field)) for name, diff in diffs])
+                                                 for field in LeaveDiff._fields))
+
+def diff_leaves(previous, leaves, people=None):
+    """
+    LeaveDiff between two leaves frames. A removed and an added leave of the same
+    person that overlap in time are reported as one changed leave.
+    people: the (name, team) pairs that may differ, when the caller knows them;
+    the leaves of everyone else are not compared.
+    """
+    previous, leaves = _plain(previous, people), _plain(leaves, people)
+    removed, added = _missing(previous, leaves), _missing(leaves, previous)
+
+    # Pair each removed leave with the first overlapping added leave of the person
+    pairs, paired = [], set()
+    if len(removed) and len(added):
+        by_person = {}
+        for position, (name, team) in enumerate(zip(added["Name"], added["Team"])):
+            by_person.setdefault((name, team), []).append(position)
+        starts, ends = added["Start"].to_numpy(), added["End"].to_numpy()
+        for old, (name, team, start, end) in enumerate(zip(removed["Name"], removed["Team"],
+                                                           removed["Start"].to_numpy(), removed["End"].to_numpy())):
+            for new in by_person.get((name, team), ()):
+                if new not in paired and starts[new] <= end and ends[new] >= start:
+                    pairs.append((old, new))
+                    paired.add(new)
+                    break
+
+    old_rows = [old for old, _ in pairs]
+    new_rows = [new for _, new in pairs]
+    changed = added.iloc[new_rows].reset_index(drop=True)
+    for col in ("Start", "End", "Label"):
+        changed[f"Previous {col}"] = removed[col].to_numpy()[old_rows]
+    return LeaveDiff(added.drop(index=added.index[new_rows]).reset_index(drop=True),
+                     removed.drop(index=removed.index[old_rows]).reset_index(drop=True),
+                     changed)
+
+def _plain(leaves, people=None):
+    """
+    The leave columns of a leaves frame (of the given (name, team) pairs only),
+    empty frames included.
+    """
+    if leaves.empty:
+        return _empty_leaves()
+    leaves = leaves[LEAVE_COLUMNS]
+    if people is not None:
+        # Cheap prefilter on the names, then the exact pairs
+        candidates = leaves[leaves["Name"].isin({name for name, _ in people}).to_numpy()]
+        pairs = zip(candidates["Name"], candidates["Team"])
+        leaves = candidates[np.fromiter((pair in people for pair in pairs), dtype=bool, count=len(candidates))]
+    return leaves.reset_index(drop=True)
+
+def _missing(leaves, other):
+    """
+    Leaves of leaves not in other, counting duplicates: a leave entered twice and
+    kept once is still reported.
+    """
+    if other.empty or leaves.empty:
+        return leaves
+    remaining = Counter(zip(*(other[col].to_numpy() for col in LEAVE_COLUMNS)))
+    missing = []
+    for leave in zip(*(leaves[col].to_numpy() for col in LEAVE_COLUMNS)):
+        missing.append(remaining[leave] == 0)
+        remaining[leave] -= 1
+    return leaves[np.array(missing, dtype=bool)].reset_index(drop=True)
+
+def _sampled_size(values, size_of, sample=1000):
+    """
+    Total size_of over values, extrapolated from an evenly spaced sample: the
+    pipeline cache budget only needs an estimate.
+    """
+    if not len(values):
+        return 0
+    picked = values[::max(len(values) // sample, 1)]
+    return int(sum(map(size_of, picked)) * len(values) / len(picked))
+
+def _row_cells(df_raw):
+    """
+    One tuple of cell values per raw row, missing cells as None.
+    """
+    if df_raw.shape[0] == 0 or df_raw.shape[1] == 0:
+        return []
+    values = df_raw.to_numpy(dtype=object, copy=True)
+    values[pd.isna(values)] = None
+    return list(map(tuple, values))
+
+def _ranges(spans):
+    """
+    Positions covered by the (first, last + 1) spans, concatenated, and the start of
+    each span among them.
+    """
+    counts = spans[:, 1] - spans[:, 0]
+    firsts = np.cumsum(counts) - counts
+    return np.repeat(spans[:, 0] - firsts, counts) + np.arange(counts.sum()), firsts
+
+def _empty_pools():
+    return {kind: {col: np.empty(0, dtype="datetime64[us]" if col in ("Start", "End") else object)
+                   for col in ("Start", "End", "Label")}
+            for kind in ("other", "js")}
+
+def _empty_leaves():
+    return pd.DataFrame({col: pd.Series(dtype="datetime64[us]" if col in ("Start", "End") else object)
+                         for col in LEAVE_COLUMNS})
@@ -0,0 +1,68 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from leave_store import LeaveStore
+
+# starts / ends: datetime64 arrays sorted by start, labels: object array aligned on them
+PersonLeaves = namedtuple("PersonLeaves", ["name", "team", "starts", "ends", "labels"])
+TeamLeaves = namedtuple("TeamLeaves", ["team", "people"])
+
+def build_leave_index(df_leaves):
+    """
+    Groups the leaves in a single pass: teams in order of first appearance, each with
+    its people in order of first appearance, each with its leaves sorted by Start.
+    Shared by the chart layout, pagination and drawing, the colors and the Excel export,
+    instead of filtering df_leaves again for every team and person.
+    df_leaves can also be a LeaveStore, whose codes are used as they are.
+    Returns a list of TeamLeaves.
+    """
+    if df_leaves.empty:
+        return []
+
+    if isinstance(df_leaves, LeaveStore):
+        team_codes, team_values = df_leaves.codes['Team'], df_leaves.values['Team']
+        name_codes, name_values = df_leaves.codes['Name'], df_leaves.values['Name']
+    else:
+        if 'Team' in df_leaves.columns:
+            team_codes, team_values = pd.factorize(df_leaves['Team'])
+        else:
+            team_codes, team_values = np.zeros(len(df_leaves), dtype=np.intp), np.array(['General'], dtype=object)
+        name_codes, name_values = pd.factorize(df_leaves['Name'])
+    team_values = np.asarray(team_values, dtype=object)
+    name_values = np.asarray(name_values, dtype=object)
+
+    # Rows without a name or team never match an equality filter: leave them out
+    valid = np.flatnonzero((team_codes >= 0) & (name_codes >= 0))
+    if len(valid) == 0:
+        return []
+    team_codes, name_codes = team_codes[valid], name_codes[valid]
+    if isinstance(df_leaves, LeaveStore):
+        starts = df_leaves.dates('Start')[valid]
+        ends = df_leaves.dates('End')[valid]
+        labels = df_leaves.column('Label')[valid]
+    else:
+        starts = df_leaves['Start'].to_numpy()[valid]
+        ends = df_leaves['End'].to_numpy()[valid]
+        labels = df_leaves['Label'].to_numpy(dtype=object)[valid]
+
+    # (team, name) pairs numbered by first appearance: within a team, that is
+    # also the order of first appearance of its people
+    person_codes, _ = pd.factorize(team_codes.astype(np.int64) * len(name_values) + name_codes)
+
+    # Stable sort: team, then person, then Start (ties keep the frame order)
+    order = np.lexsort((starts, person_codes, team_codes))
+    bounds = np.flatnonzero(np.diff(person_codes[order])) + 1
+
+    index = []
+    last_team_code = -1
+    for rows in np.split(order, bounds):
+        first = rows[0]
+        team = team_values[team_codes[first]]
+        if team_codes[first] != last_team_code:
+            last_team_code = team_codes[first]
+            index.append(TeamLeaves(team, []))
+        index[-1].people.append(PersonLeaves(name_values[name_codes[first]], team,
+                                             starts[rows], ends[rows], labels[rows]))
+    return index
@@ -0,0 +1,215 @@
+import sys
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+EPOCH = date(1970, 1, 1)
+# Text columns of a leaves frame kept as codes into their distinct values
+TEXT_COLUMNS = ("Name", "Team", "Label")
+# Label code of the "DD/MM - DD/MM" labels of the parser, rebuilt from Start/End when read
+DATES_LABEL = -2
+# "DD/MM" of every (month, day), indexed by (month - 1) * 31 + day - 1
+_DAY_MONTH = np.array([f"{day:02d}/{month:02d}" for month in range(1, 13) for day in range(1, 32)], dtype=object)
+
+class Leave:
+    """
+    One leave of a LeaveStore: start and end are datetime.date (end included).
+    """
+    __slots__ = ("name", "team", "start", "end", "label")
+
+    def __init__(self, name, team, start, end, label):
+        self.name = name
+        self.team = team
+        self.start = start
+        self.end = end
+        self.label = label
+
+    def __eq__(self, other):
+        if not isinstance(other, Leave):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.__slots__)
+
+    def __repr__(self):
+        return f"Leave({self.name!r}, {self.team!r}, {self.start}, {self.end}, {self.label!r})"
+
+class LeaveStore:
+    """
+    Columnar leaves, about 16 bytes per leave instead of over 200 for the
+    process_leave_data frame (16.6 measured by benchmark.py store, at 7,500 as at 30,000 leaves):
+    Start/End are int32 day ordinals (days since 1970-01-01), Name/Team/Label and
+    any other text column (the "Source" of process_excel_sheets) are codes into their
+    interned distinct values, in the smallest integer type that holds them like
+    pandas categoricals, numbered in order of first appearance (-1: missing).
+    Labels of the "DD/MM - DD/MM" form matching their own dates, nearly one distinct
+    value per range, are not kept: their code is DATES_LABEL and they are rebuilt on read.
+    A frame without Team gets the 'General' team, as in the chart.
+    Built from and converted back to the frame with from_frame / to_frame; the
+    chart, the colors, the Excel export and build_leave_index take either.
+    """
+    __slots__ = ("starts", "ends", "codes", "values", "columns")
+
+    def __init__(self, starts, ends, codes, values, columns):
+        self.starts = starts
+        self.ends = ends
+        self.codes = codes # column -> integer codes
+        self.values = values # column -> object array of the distinct values
+        self.columns = columns # frame columns, in order
+
+    @classmethod
+    def from_frame(cls, df_leaves):
+        if df_leaves.empty:
+            return cls(np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32),
+                       {col: np.empty(0, dtype=np.int8) for col in TEXT_COLUMNS},
+                       {col: np.empty(0, dtype=object) for col in TEXT_COLUMNS},
+                       ("Name", "Team", "Start", "End", "Label"))
+        if 'Team' not in df_leaves.columns:
+            df_leaves = df_leaves.assign(Team='General')
+        starts, ends = _day_ordinals(df_leaves['Start']), _day_ordinals(df_leaves['End'])
+        codes, values = {}, {}
+        for col in df_leaves.columns:
+            if col in ("Start", "End"):
+                continue
+            if col == "Label":
+                col_codes, col_values = _factorize_labels(df_leaves[col], starts, ends)
+            else:
+                col_codes, col_values = pd.factorize(df_leaves[col])
+            codes[col] = col_codes.astype(_codes_dtype(len(col_values)))
+            # One string object per distinct value, shared with every other store
+            values[col] = np.array([sys.intern(v) if isinstance(v, str) else v for v in col_values], dtype=object)
+        return cls(starts, ends, codes, values, tuple(df_leaves.columns))
+
+    def to_frame(self, compact=False):
+        """
+        The process_leave_data frame (datetime64[us] Start/End).
+        compact: text columns as categoricals instead of strings.
+        """
+        if not len(self):
+            return pd.DataFrame([])
+        data = {}
+        for col in self.columns:
+            if col in ("Start", "End"):
+                data[col] = self.dates(col)
+            else:
+                if (self.codes[col] == DATES_LABEL).any():
+                    categorical = pd.Categorical(self.column(col), categories=self.categories(col))
+                else:
+                    categorical = pd.Categorical.from_codes(self.codes[col], categories=self.values[col])
+                data[col] = categorical if compact else pd.Series(categorical).astype("str")
+        return pd.DataFrame(data)
+
+    def column(self, col):
+        """
+        Object array of one text column, with None for missing values.
+        """
+        col_codes = self.codes[col]
+        derived = col_codes == DATES_LABEL
+        column = np.append(self.values[col], None)[np.where(derived, -1, col_codes)]
+        if derived.any():
+            column[derived] = _range_labels(self.starts[derived], self.ends[derived])
+        return column
+
+    def dates(self, col):
+        """
+        datetime64[us] array of Start or End.
+        """
+        days = self.starts if col == "Start" else self.ends
+        return days.astype('datetime64[D]').astype('datetime64[us]')
+
+    def categories(self, col):
+        """
+        Distinct values of a text column, in order of first appearance.
+        """
+        if (self.codes[col] == DATES_LABEL).any():
+            return [value for value in pd.unique(self.column(col)) if value is not None]
+        return list(self.values[col])
+
+    @property
+    def empty(self):
+        return len(self.starts) == 0
+
+    @property
+    def nbytes(self):
+        """
+        Memory held by the arrays and the distinct values.
+        """
+        size = self.starts.nbytes + self.ends.nbytes
+        for col, col_codes in self.codes.items():
+            size += col_codes.nbytes + self.values[col].nbytes
+            size += sum(sys.getsizeof(v) for v in self.values[col])
+        return size
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("leave index out of range")
+        def text(col):
+            code = self.codes[col][i]
+            if code == DATES_LABEL:
+                return _range_labels(self.starts[i:i + 1], self.ends[i:i + 1])[0]
+            return self.values[col][code] if code >= 0 else None
+        return Leave(text("Name"), text("Team"), EPOCH + timedelta(days=int(self.starts[i])),
+                     EPOCH + timedelta(days=int(self.ends[i])), text("Label"))
+
+    def __iter__(self):
+        names, teams, labels = (self.column(col) for col in TEXT_COLUMNS)
+        for name, team, start, end, label in zip(names, teams, self.starts.tolist(), self.ends.tolist(), labels):
+            yield Leave(name, team, EPOCH + timedelta(days=start), EPOCH + timedelta(days=end), label)
+
+def _codes_dtype(count):
+    """
+    Smallest signed integer type holding the codes of count distinct values and -1.
+    """
+    for dtype in (np.int8, np.int16, np.int32):
+        if count <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+def _range_labels(starts, ends):
+    """
+    "DD/MM - DD/MM" labels of day ordinal arrays, as the parser writes them.
+    """
+    days = np.concatenate([starts, ends]).astype('datetime64[D]')
+    months = days.astype('datetime64[M]')
+    positions = months.astype(np.int64) % 12 * 31 + (days - months).astype(np.int64)
+    day_months = _DAY_MONTH[positions]
+    return day_months[:len(starts)] + " - " + day_months[len(starts):]
+
+def _factorize_labels(labels, starts, ends):
+    """
+    pd.factorize of the Label column, except that the labels matching their
+    own dates get the DATES_LABEL code and are left out of the distinct values.
+    """
+    labels = labels.to_numpy(dtype=object)
+    derived = labels == _range_labels(starts, ends)
+    other_codes, values = pd.factorize(labels[~derived])
+    codes = np.full(len(labels), DATES_LABEL, dtype=np.int64)
+    codes[~derived] = other_codes
+    return codes, values
+
+def _day_ordinals(dates):
+    """
+    int32 days since 1970-01-01 of a datetime column (time of day dropped).
+    """
+    return dates.to_numpy().astype('datetime64[D]').astype(np.int64).astype(np.int32)
+
+def day_ordinal(value):
+    """
+    Day ordinal (days since 1970-01-01) of a date, datetime, Timestamp or date string.
+    """
+    if not hasattr(value, "toordinal"):
+        value = pd.Timestamp(value)
+    return value.toordinal() - EPOCH.toordinal()
+
+def leave_date_bounds(leaves):
+    """
+    (first Start, last End) as Timestamps, of a leaves frame or a LeaveStore.
+    """
+    if isinstance(leaves, LeaveStore):
+        return (pd.Timestamp(np.datetime64(int(leaves.starts.min()), 'D')),
+                pd.Timestamp(np.datetime64(int(leaves.ends.max()), 'D')))
+    return leaves['Start'].min(), leaves['End'].max()
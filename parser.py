@@ -1,7 +1,30 @@
 import pandas as pd
+import numpy as np
 import re
 import io
-import requests
+import codecs
+import importlib.util
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from pandas.api.types import union_categoricals
+
+# Rows whose first cell contains one of these keywords are sheet metadata, not people
+IGNORED_ROW_KEYWORDS = ["PÉRIODE", "PERIODE", "CONGES", "FORMULAIRE", "INSTRUCTIONS", "SOLDE", "RTT", "ANCIENNETÉ", "PRÉSENCE", "PRESENCE", "RÉFÉRENCE", "REFERENCE", "COMMENTAIRE", "NOTE", "TOTAL", "RESTANT"]
+# Team header detection (see process_leave_data)
+TEAM_KEYWORDS = ["SERVICE", "DIRECTION", "PÔLE", "POLE", "ÉQUIPE", "EQUIPE", "DÉPARTEMENT", "DEPARTEMENT", "AGENCE", "BUREAU"]
+TEAM_IGNORED_KEYWORDS = ["PÉRIODE", "PERIODE", "CONGES", "FORMULAIRE", "INSTRUCTIONS", "SOLDE", "RTT", "ANCIENNETÉ"]
+
+# Compiled tokens for scan_cell: same patterns as parse_date_range / parse_extra_days,
+# with one group per date component
+RANGE_PATTERN = r"du\s+(\d{1,2})/(\d{1,2})/(\d{2,4})\s+au\s+(\d{1,2})/(\d{1,2})/(\d{2,4})"
+JS_PATTERN = r"\(\+\d+\s*JS\s*:\s*(.*?)\)"
+RANGE_TOKEN = re.compile(RANGE_PATTERN, re.IGNORECASE)
+CELL_TOKENS = re.compile(f"{RANGE_PATTERN}|{JS_PATTERN}", re.IGNORECASE)
+JS_PART = re.compile(r"(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?")
+JS_FULL_DATE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{2,4})")
+MONTH_LENGTHS = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
 
 def parse_date_range(text):
     """
@@ -116,78 +139,743 @@ def parse_extra_days(text):
     
     return extra_dates
 
-def load_data(source):
+def scan_cell(text, reference_year=None):
     """
-    Loads data from a CSV file, Excel file, or Google Sheet URL.
-    Returns a pandas DataFrame.
+    Single-pass tokenizer for a leave cell: pulls the "Du ... au ..." range and the
+    "(+N JS : ...)" lists out of the text with one compiled pattern.
+    Same results as parse_date_range / parse_extra_days, but as plain integer
+    (year, month, day) tuples so that Timestamps can be built later in bulk.
+
+    reference_year: current year used for two-digit years and "DD/MM" days
+    (defaults to today's year).
+    Returns (date_range, extra_days): ((y, m, d), (y, m, d)) or None, and a list of (y, m, d).
     """
-    if isinstance(source, str) and source.startswith("http"):
-        # Assume it's a Google Sheet URL
-        # Convert /edit URL to /export format for CSV
-        if "/edit" in source:
-            base_url = source.split("/edit")[0]
-            # Check if gid is present anywhere
+    if not isinstance(text, str):
+        return None, []
+    if reference_year is None:
+        reference_year = pd.Timestamp.now().year
+
+    date_range = None
+    range_seen = False
+    extra_days = []
+    for match in CELL_TOKENS.finditer(text):
+        content = match.group(7)
+        if content is None:
+            # Only the first range of the cell counts, even if its dates are invalid
+            if not range_seen:
+                range_seen = True
+                date_range = _range_from_match(match, reference_year)
+            continue
+
+        # A range written inside the parentheses is still found by parse_date_range
+        if not range_seen:
+            inner = RANGE_TOKEN.search(match.group(0))
+            if inner:
+                range_seen = True
+                date_range = _range_from_match(inner, reference_year)
+        extra_days.extend(_scan_js_content(content, reference_year))
+
+    return date_range, extra_days
+
+def _range_from_match(match, reference_year):
+    start = _dayfirst_date(match.group(1), match.group(2), match.group(3), reference_year)
+    end = _dayfirst_date(match.group(4), match.group(5), match.group(6), reference_year)
+    if start is None or end is None:
+        return None
+    return start, end
+
+def _is_valid_date(year, month, day):
+    if not (1 <= year <= 9999 and 1 <= month <= 12 and day >= 1):
+        return False
+    if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        return day <= 29
+    return day <= MONTH_LENGTHS[month - 1]
+
+def _dayfirst_date(first, second, third, reference_year):
+    """
+    Integer equivalent of pd.to_datetime("A/B/C", dayfirst=True) for the tokens
+    of a "Du ... au ..." range. Returns (y, m, d) or None.
+    """
+    a, b, c = int(first), int(second), int(third)
+    # A leading token above 31 can only be a year: dateutil then reads Y/D/M
+    if a > 31:
+        year, day, month = a, b, c
+    else:
+        day, month, year = a, b, c
+
+    # Two-digit years use dateutil's window of 50 years around the current year
+    if len(third) <= 2:
+        year += reference_year // 100 * 100
+        if year >= reference_year + 50:
+            year -= 100
+        elif year < reference_year - 50:
+            year += 100
+
+    if _is_valid_date(year, month, day):
+        return year, month, day
+    # dayfirst is only a preference: an impossible month falls back to M/D
+    if _is_valid_date(year, day, month):
+        return year, day, month
+    return None
+
+def _scan_js_content(content, reference_year):
+    """
+    Parses the inside of a "(+N JS : ...)" list like parse_extra_days does:
+    parts are resolved right to left, partial dates borrowing the year (and month)
+    of the closest valid date written after them.
+    """
+    parts = content.replace(" et ", ",").replace(" ET ", ",").split(",")
+    days = []
+    last_date = None
+    for part in reversed(parts):
+        part = part.strip()
+        match = JS_PART.search(part)
+        if match and match.group(3) is None and part.count("/") >= 2:
+            # A full date further in the part wins over a leading DD/MM
+            match = JS_FULL_DATE.search(part) or match
+
+        if match is None:
+            # Just DD
+            if last_date and len(part) <= 2 and part.isdecimal():
+                date = (last_date[0], last_date[1], int(part))
+                if _is_valid_date(*date):
+                    days.append(date)
+            continue
+
+        year_text = match.group(3)
+        if year_text is None:
+            # DD/MM
+            year = last_date[0] if last_date else reference_year
+        else:
+            # DD/MM/YY(YY)
+            year = int("20" + year_text) if len(year_text) == 2 else int(year_text)
+        date = (year, int(match.group(2)), int(match.group(1)))
+        if _is_valid_date(*date):
+            days.append(date)
+            last_date = date
+    return days
+
+CellCacheInfo = namedtuple("CellCacheInfo", ["hits", "misses", "evictions", "maxsize", "currsize"])
+
+class CellCache:
+    """
+    Bounded LRU cache in front of scan_cell, keyed on the raw cell text.
+    Results depend on the current year (two-digit years, "DD/MM" JS days), so the
+    reference year is part of the key: entries from a previous year are never
+    served again and simply age out.
+    Thread-safe, as Streamlit sessions share the module.
+    """
+    def __init__(self, maxsize=8192):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def scan(self, text, reference_year=None):
+        if reference_year is None:
+            reference_year = pd.Timestamp.now().year
+        key = (text, reference_year)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        date_range, extra_days = scan_cell(text, reference_year)
+        result = (date_range, tuple(extra_days))
+
+        with self._lock:
+            if self.maxsize > 0:
+                self._entries[key] = result
+                self._evict()
+        return result
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        with self._lock:
+            return CellCacheInfo(self.hits, self.misses, self.evictions, self.maxsize, len(self._entries))
+
+    def _evict(self):
+        while len(self._entries) > max(self.maxsize, 0):
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+# Shared by every call of the vectorized engine
+_cell_cache = CellCache()
+
+def scan_cell_cached(text, reference_year=None):
+    """
+    scan_cell through the shared LRU cache. JS days are returned as a tuple.
+    """
+    return _cell_cache.scan(text, reference_year)
+
+def cell_cache_info():
+    """
+    Returns CellCacheInfo(hits, misses, evictions, maxsize, currsize) for the shared cell cache.
+    """
+    return _cell_cache.info()
+
+def clear_cell_cache():
+    """
+    Empties the shared cell cache and resets its statistics.
+    """
+    _cell_cache.clear()
+
+def set_cell_cache_size(maxsize):
+    """
+    Changes the number of cell texts kept by the shared cache (0 disables caching).
+    """
+    _cell_cache.resize(maxsize)
+
+def google_sheet_csv_url(source, gid=None):
+    """
+    Converts a Google Sheet /edit link (or a bare .../d/<id> link) to its CSV export URL.
+    "Published to web", /export and gviz links are kept, other URLs are returned unchanged.
+    gid: tab to export, overriding the one found in the link. Raises ValueError
+    when the URL has no tab to override.
+    """
+    bare = re.fullmatch(r"(https?://docs\.google\.com/spreadsheets/d/[\w-]+)/?", source.split("#")[0])
+    # Convert /edit URL to /export format for CSV
+    if "/edit" in source or bare:
+        base_url = bare.group(1) if bare else source.split("/edit")[0]
+        # Check if gid is present anywhere
+        if gid is None:
             gid = "0"
             gid_match = re.search(r"[#&?]gid=(\d+)", source)
             if gid_match:
                 gid = gid_match.group(1)
-            
-            source = f"{base_url}/gviz/tq?tqx=out:csv&gid={gid}"
-            
-        elif "/pub" in source:
-             # User provided a "Published to web" link, use as is but ensure csv format if possible
-             pass
-
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = requests.get(source, headers=headers)
-        response.raise_for_status()
         
-        # Check if we got a login page (HTML) instead of CSV
-        if "text/html" in response.headers.get("Content-Type", ""):
-             raise ValueError("Google Sheets a demandé une connexion. Veuillez utiliser 'Fichier > Partager > Publier sur le web' et choisir le format CSV.") 
+        source = f"{base_url}/gviz/tq?tqx=out:csv&gid={gid}"
+        
+    elif any(part in source for part in ("/pub", "/export", "/gviz/")):
+         # User provided a "Published to web" or export link, use as is but ensure csv format if possible
+         if gid is not None:
+             parts = urlsplit(source)
+             query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != "gid"]
+             query.append(("gid", str(gid)))
+             source = urlunsplit(parts._replace(query=urlencode(query, safe=":"), fragment=""))
+
+    elif gid is not None:
+        raise ValueError(f"Impossible de choisir l'onglet {gid} pour l'URL {source}")
+
+    return source
+
+def fetch_google_sheet(source, fetcher=None):
+    """
+    Downloads a Google Sheet (edit or "Published to web" link) as CSV.
+    Goes through the shared SheetFetcher (pooled session, disk cache revalidated
+    with ETag / If-Modified-Since) unless another fetcher is given.
+    Returns the raw CSV bytes (see read_csv_bytes).
+    """
+    if fetcher is None:
+        from fetcher import get_default_fetcher
+        fetcher = get_default_fetcher()
+    return fetcher.fetch(google_sheet_csv_url(source)).content
+
+def load_sheet_tabs(sources, gids=None, max_workers=4, fetcher=None):
+    """
+    Fetches and parses several Google Sheets tabs concurrently.
+    sources: one spreadsheet URL combined with a list of gids (one tab per department),
+    or a list of sheet URLs.
+    Returns (df_leaves, errors): the leaves of every tab concatenated in input order
+    with a "Source" column (the gid, or the URL), and a dict {source: error message}
+    for the tabs that could not be loaded.
+    """
+    if gids is not None:
+        tabs = [(str(gid), google_sheet_csv_url(sources, gid=gid)) for gid in gids]
+    else:
+        if isinstance(sources, str):
+            sources = [sources]
+        tabs = [(url, google_sheet_csv_url(url)) for url in sources]
+    if fetcher is None:
+        from fetcher import get_default_fetcher
+        fetcher = get_default_fetcher()
+
+    def load_tab(csv_url):
+        df_raw = read_csv_bytes(fetcher.fetch(csv_url).content)
+        return process_leave_data(df_raw)
+
+    results = {}
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tabs)))) as executor:
+        futures = {executor.submit(load_tab, csv_url): label for label, csv_url in tabs}
+        for future in as_completed(futures):
+            label = futures[future]
+            try:
+                results[label] = future.result()
+            except Exception as e:
+                errors[label] = str(e)
+
+    return _concat_sources([(label, results[label]) for label, _ in tabs if label in results]), errors
+
+def detect_encoding(data, sample_size=64 * 1024):
+    """
+    Guesses the encoding of a CSV from its first bytes: BOM, then a UTF-8 validity
+    check, then the legacy Windows / ISO encodings of French spreadsheets.
+    """
+    if data.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+
+    sample = data[:sample_size]
+    try:
+        # A multi-byte character cut at the end of the sample is not an error
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=len(data) <= sample_size)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return _legacy_encoding(sample)
 
-        df = pd.read_csv(io.StringIO(response.text))
+def _legacy_encoding(data):
+    # cp1252 is latin1 plus printable characters in 0x80-0x9F (’, œ, €...),
+    # but leaves a few bytes undefined: latin1 accepts anything
+    try:
+        data.decode("cp1252")
+        return "cp1252"
+    except UnicodeDecodeError:
+        return "latin1"
+
+def decode_csv_bytes(data):
+    """
+    Decodes raw CSV bytes with the encoding guessed by detect_encoding.
+    Returns (text, encoding).
+    """
+    encoding = detect_encoding(data)
+    try:
+        return data.decode(encoding), encoding
+    except UnicodeDecodeError:
+        # The sample looked like UTF-8 but a later byte is not
+        encoding = _legacy_encoding(data)
+        return data.decode(encoding), encoding
+
+def read_csv_bytes(data):
+    """
+    Parses raw CSV bytes (upload, local file or HTTP body) in a single pass.
+    The detected encoding is reported in df.attrs["encoding"].
+    """
+    text, encoding = decode_csv_bytes(data)
+    df = pd.read_csv(io.StringIO(text))
+    df.attrs["encoding"] = encoding
+    return df
+
+def excel_engine():
+    """
+    Engine used by read_xlsx: "calamine" when python-calamine is installed
+    (Rust parser, several times faster), otherwise "openpyxl" in read-only mode.
+    """
+    return "calamine" if importlib.util.find_spec("python_calamine") is not None else "openpyxl"
+
+def read_xlsx(source, sheet_name=0):
+    """
+    Fast xlsx reader (path, bytes or binary file object) returning every cell as a string,
+    like pd.read_excel(dtype=str) but without loading styles or building the full workbook.
+    sheet_name: sheet index or name, or None for every sheet ({sheet name: DataFrame}).
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    if excel_engine() == "calamine":
+        return pd.read_excel(source, sheet_name=sheet_name, engine="calamine", dtype=str)
+
+    from openpyxl import load_workbook
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        if sheet_name is None:
+            return {ws.title: _read_only_sheet_frame(ws) for ws in wb.worksheets}
+        ws = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+        return _read_only_sheet_frame(ws)
+    finally:
+        # Read-only workbooks keep the zip file open until closed
+        wb.close()
+
+def _read_only_sheet_frame(ws):
+    """
+    Streams the values of a read-only worksheet into a string DataFrame,
+    trimming and padding rows the way pd.read_excel does.
+    """
+    from openpyxl.cell.cell import ERROR_CODES
+    from pandas.io.parsers import TextParser
+
+    # Some writers store a wrong <dimension>, which read-only mode would trust
+    ws.reset_dimensions()
+
+    data = []
+    last_row_with_data = -1
+    for values in ws.iter_rows(values_only=True):
+        row = [_excel_cell_text(value, ERROR_CODES) for value in values]
+        while row and row[-1] == "":
+            row.pop()
+        if row:
+            last_row_with_data = len(data)
+        data.append(row)
+    data = data[:last_row_with_data + 1]
+    if not data:
+        return pd.DataFrame()
+
+    width = max(len(row) for row in data)
+    data = [row + [""] * (width - len(row)) for row in data]
+    # Same header / blank line handling as read_excel (first row as header, "Unnamed: n"...)
+    return TextParser(data, header=0, dtype=str, skip_blank_lines=False).read()
+
+def _excel_cell_text(value, error_codes):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        # Formula errors (#REF!, #DIV/0!...) are missing values for read_excel
+        return None if value in error_codes else value
+    if isinstance(value, float) and value.is_integer():
+        # Whole numbers are stored as floats: 3.0 reads "3", as with read_excel
+        return str(int(value))
+    return str(value)
+
+def load_excel_leaves(source):
+    """
+    Reads every sheet of an xlsx workbook with read_xlsx and parses them into one
+    leaves frame with a "Source" column holding the sheet name.
+    """
+    return process_excel_sheets(read_xlsx(source, sheet_name=None))
+
+def process_excel_sheets(frames):
+    """
+    Parses {sheet name: raw frame} (read_xlsx(..., sheet_name=None)) into one leaves
+    frame, in sheet order, with a "Source" column holding the sheet name.
+    """
+    return _concat_sources([(name, process_leave_data(df_raw)) for name, df_raw in frames.items()])
+
+def _concat_sources(results):
+    """
+    Concatenates (label, leaves) pairs in order, tagging each row with its label in a "Source" column.
+    """
+    frames = [leaves.assign(Source=label) for label, leaves in results if not leaves.empty]
+    if not frames:
+        return pd.DataFrame([])
+    return pd.concat(frames, ignore_index=True)
+
+def load_data_from_bytes(data, filename):
+    """
+    Loads the raw content of a CSV or Excel file, the format being taken from filename.
+    Returns a pandas DataFrame.
+    """
+    if filename.endswith(".csv"):
+        return read_csv_bytes(data)
+    elif filename.endswith(".xlsx"):
+        return read_xlsx(data)
+    else:
+         raise ValueError("Unsupported file format")
+
+def load_data(source):
+    """
+    Loads data from a CSV file, Excel file, or Google Sheet URL.
+    The bytes are read once whatever the source; for CSVs the detected encoding
+    is available in df.attrs["encoding"], Excel files go through read_xlsx (string cells).
+    Returns a pandas DataFrame.
+    """
+    if isinstance(source, str) and source.startswith("http"):
+        # Assume it's a Google Sheet URL
+        df = read_csv_bytes(fetch_google_sheet(source))
     elif hasattr(source, "name"):
          # Streamlit UploadedFile object
-        if source.name.endswith(".csv"):
-            # Try to read with default, then fallback
-            try:
-                source.seek(0)
-                df = pd.read_csv(source)
-            except UnicodeDecodeError:
-                source.seek(0)
-                try:
-                    df = pd.read_csv(source, encoding='latin1')
-                except UnicodeDecodeError:
-                    source.seek(0)
-                    df = pd.read_csv(source, encoding='cp1252')
-        elif source.name.endswith(".xlsx"):
-            df = pd.read_excel(source)
-        else:
-             raise ValueError("Unsupported file format")
+        source.seek(0)
+        df = load_data_from_bytes(source.read(), source.name)
     else:
         # Local file path or other
         if source.endswith(".csv"):
-            try:
-                df = pd.read_csv(source)
-            except UnicodeDecodeError:
-                 try:
-                     df = pd.read_csv(source, encoding='latin1')
-                 except UnicodeDecodeError:
-                     df = pd.read_csv(source, encoding='cp1252')
+            with open(source, "rb") as f:
+                df = read_csv_bytes(f.read())
         elif source.endswith(".xlsx"):
-             df = pd.read_excel(source)
+             df = read_xlsx(source)
         else:
              raise ValueError("Unsupported file format")
              
     return df
 
-def process_leave_data(df):
+def _sniff_csv_encoding(source, block_size=1 << 20):
+    """
+    Encoding that decode_csv_bytes would pick for the whole file, found by
+    reading it block by block so that memory stays bounded.
+    """
+    f = open(source, "rb") if isinstance(source, str) else source
+    start = f.tell()
+    try:
+        head = f.read(4)
+        if head.startswith(codecs.BOM_UTF8):
+            return "utf-8-sig"
+        if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return "utf-16"
+
+        utf8_decoder = codecs.getincrementaldecoder("utf-8")()
+        is_utf8 = is_cp1252 = True
+        block = head
+        while True:
+            if is_utf8:
+                try:
+                    utf8_decoder.decode(block, final=not block)
+                except UnicodeDecodeError:
+                    is_utf8 = False
+            if is_cp1252:
+                try:
+                    block.decode("cp1252")
+                except UnicodeDecodeError:
+                    is_cp1252 = False
+            if not block or not (is_utf8 or is_cp1252):
+                break
+            block = f.read(block_size)
+    finally:
+        if f is source:
+            f.seek(start)
+        else:
+            f.close()
+
+    if is_utf8:
+        return "utf-8"
+    return "cp1252" if is_cp1252 else "latin1"
+
+def iter_leave_chunks(source, chunksize=5000, encoding=None):
+    """
+    Streams a CSV export (path or binary file object) chunk by chunk and yields
+    the leave rows found in each chunk, before the JS merge.
+    The current team is carried across chunk boundaries, and only one chunk of
+    raw rows is held in memory at a time.
+    """
+    if encoding is None:
+        encoding = _sniff_csv_encoding(source)
+
+    current_team = "General"
+    with pd.read_csv(source, chunksize=chunksize, dtype=str, encoding=encoding) as reader:
+        for chunk in reader:
+            leaves, current_team = _extract_leaves(chunk, current_team)
+            if not leaves.empty:
+                yield leaves
+
+def process_leave_data_streaming(source, chunksize=5000, encoding=None, compact=True):
+    """
+    Same result as process_leave_data(load_data(source)) for very large CSV exports,
+    without ever materializing the raw frame: leaves are accumulated chunk by chunk
+    with categorical Name/Team/Label, then the JS days are merged once at the end.
+    compact: keep Name, Team and Label as categoricals (False returns plain strings,
+    exactly like process_leave_data).
+    """
+    text_parts = {"Name": [], "Team": [], "Label": []}
+    starts, ends = [], []
+    for leaves in iter_leave_chunks(source, chunksize=chunksize, encoding=encoding):
+        for col, parts in text_parts.items():
+            parts.append(pd.Categorical(leaves[col]))
+        starts.append(leaves['Start'].to_numpy())
+        ends.append(leaves['End'].to_numpy())
+
+    if not starts:
+        return pd.DataFrame([])
+
+    # Sorted categories keep the lexicographic order used by the JS merge
+    leaves = pd.DataFrame({
+        "Name": union_categoricals(text_parts["Name"], sort_categories=True),
+        "Team": union_categoricals(text_parts["Team"], sort_categories=True),
+        "Start": np.concatenate(starts),
+        "End": np.concatenate(ends),
+        "Label": union_categoricals(text_parts["Label"], sort_categories=True),
+    })
+    # Release the per-chunk pieces before the merge makes its own copies
+    del text_parts, starts, ends
+    leaves = _merge_js_days_vectorized(leaves)
+    return leaves.astype({col: "category" if compact else "str" for col in ("Name", "Team", "Label")})
+
+def process_leave_data(df, engine="vectorized"):
     """
     Process the raw DataFrame to extract leave intervals.
     Returns a DataFrame with columns: [Name, Team, Start, End, Label]
+
+    engine: "vectorized" (default) melts every period cell into one Series and
+    parses each distinct text once with scan_cell, "loop" is the original
+    row-by-row reference implementation.
+    Both engines return exactly the same frame (checked by `python benchmark.py parse`).
+    """
+    if engine == "vectorized":
+        return _process_leave_data_vectorized(df)
+    if engine == "loop":
+        return _process_leave_data_loop(df)
+    raise ValueError(f"Unknown engine: {engine}")
+
+def _dates_from_parts(years, months, days):
+    """
+    Builds a datetime64[us] array from valid (year, month, day) integer arrays.
+    """
+    years = np.asarray(years, dtype=np.int64)
+    months = np.asarray(months, dtype=np.int64)
+    days = np.asarray(days, dtype=np.int64)
+    first = ((years - 1970) * 12 + months - 1).astype("datetime64[M]")
+    return (first.astype("datetime64[D]") + (days - 1)).astype("datetime64[us]")
+
+def _text_mask(block):
+    """
+    Boolean array (rows x columns of block) flagging the cells holding text (the cell
+    parsers ignore anything else): only object and string columns hold any.
+    One pass over every cell instead of one per column, whose fixed cost dominates
+    for the few rows parsed by an incremental update.
+    """
+    values = block.to_numpy(dtype=object)
+    is_text = np.fromiter((isinstance(v, str) for v in values.ravel()), dtype=bool, count=values.size)
+    text_columns = np.array([dtype == object or isinstance(dtype, pd.StringDtype) for dtype in block.dtypes], dtype=bool)
+    return is_text.reshape(values.shape) & text_columns
+
+def _filled_mask(block):
+    """
+    Boolean array (rows x columns of block) flagging the cells that are not blank once stripped.
+    """
+    cells = pd.Series(block.to_numpy(dtype=object).ravel(), dtype=object)
+    return (cells.notna() & cells.astype(str).str.strip().ne("")).to_numpy(dtype=bool).reshape(block.shape)
+
+def _classify_rows(df, initial_team="General"):
+    """
+    Vectorized row classification shared by the vectorized engine.
+    Returns (is_person, names, teams) as arrays aligned on the rows of df:
+    team header rows are detected in bulk and forward-filled onto the people below.
+    """
+    is_person, is_team, labels, names = _row_kinds(df)
+    teams = pd.Series(labels).where(is_team).ffill().fillna(initial_team).to_numpy(dtype=object)
+    return is_person, names, teams
+
+def _row_kinds(df):
+    """
+    The part of _classify_rows that only depends on each row itself.
+    Returns (is_person, is_team, labels, names): labels are the stripped first cells.
+    """
+    first = df.iloc[:, 0]
+    col0 = first.astype(str).str.strip().where(first.notna(), "")
+    name_upper = col0.str.upper()
+
+    ignored = name_upper.str.contains("|".join(map(re.escape, IGNORED_ROW_KEYWORDS)))
+    has_name = col0.ne("")
+
+    rest = df.iloc[:, 1:]
+    if rest.shape[1]:
+        has_content = _filled_mask(rest).any(axis=1)
+    else:
+        has_content = np.zeros(len(df), dtype=bool)
+
+    is_keyword_present = name_upper.str.contains("|".join(map(re.escape, TEAM_KEYWORDS)))
+    is_team = (has_name & ~ignored & ~has_content & (col0.str.isupper() | is_keyword_present)).to_numpy(dtype=bool)
+    is_person = (has_name & ~ignored).to_numpy(dtype=bool) & has_content
+
+    names = col0.str.split("\n").str[0].str.strip().to_numpy(dtype=object)
+    return is_person, is_team, col0.to_numpy(dtype=object), names
+
+def _process_leave_data_vectorized(df):
+    """
+    Vectorized process_leave_data: the period cells of every person row are melted
+    into one long Series, each distinct cell text goes once through the cached scan_cell and
+    the leave frame is rebuilt in bulk, with a single Timestamp conversion at the end.
+    """
+    leaves, _ = _extract_leaves(df)
+    if leaves.empty:
+        return leaves
+    return _merge_js_days_vectorized(leaves)
+
+def _extract_leaves(df, initial_team="General"):
+    """
+    Leave rows of a block of sheet rows, before the JS merge.
+    initial_team is the team in effect above the first row; the team in effect
+    after the last row is returned with the leaves, so that consecutive blocks
+    (streamed chunks) can be chained.
+    Returns (leaves, last_team).
+    """
+    if df.shape[0] == 0 or df.shape[1] == 0:
+        return pd.DataFrame([]), initial_team
+
+    is_person, names, teams = _classify_rows(df, initial_team)
+    leaves, _ = _leaves_of_rows(df, np.flatnonzero(is_person), names, teams)
+    return leaves, teams[-1]
+
+def _leaves_of_rows(df, person_rows, names, teams):
+    """
+    Leave rows (before the JS merge) of the given person rows of df, in row order,
+    names / teams being the _classify_rows arrays of the whole of df.
+    Returns (leaves, rows): rows is the position in df of the row of each leave.
+    """
+    no_leaves = pd.DataFrame([]), np.empty(0, dtype=np.intp)
+
+    # Melt the period columns of person rows, row-major like the reference loop
+    rest = df.iloc[person_rows, 1:]
+    if rest.shape[1] == 0 or len(person_rows) == 0:
+        return no_leaves
+    is_text = _text_mask(rest)
+    row_pos, col_pos = np.nonzero(is_text)
+    cells = pd.Series(rest.to_numpy(dtype=object)[row_pos, col_pos], dtype=object)
+    if cells.empty:
+        return no_leaves
+
+    # Scan each distinct text once, through the shared cell cache
+    codes, uniques = pd.factorize(cells)
+    reference_year = pd.Timestamp.now().year
+    scans = [_cell_cache.scan(text, reference_year) for text in uniques]
+
+    has_range = np.fromiter((date_range is not None for date_range, _ in scans), dtype=bool, count=len(scans))
+    range_parts = np.array([date_range[0] + date_range[1] if date_range else (0,) * 6 for date_range, _ in scans],
+                           dtype=np.int64).reshape(-1, 6)
+    js_counts = np.fromiter((len(days) for _, days in scans), dtype=np.int64, count=len(scans))
+    js_parts = np.array([day for _, days in scans for day in days], dtype=np.int64).reshape(-1, 3)
+    js_offsets = np.cumsum(js_counts) - js_counts
+
+    # Expand the results back onto every cell
+    range_cells = np.flatnonzero(has_range[codes])
+    range_rows = range_parts[codes[range_cells]]
+    cell_js_counts = js_counts[codes]
+    js_cells = np.repeat(np.arange(len(cells)), cell_js_counts)
+    # Position of each JS day within its cell (scan_cell already lists them in reference order)
+    js_sequence = np.arange(len(js_cells)) - np.repeat(np.cumsum(cell_js_counts) - cell_js_counts, cell_js_counts)
+    js_rows = js_parts[js_offsets[codes[js_cells]] + js_sequence]
+
+    n_ranges, n_js = len(range_cells), len(js_cells)
+    if n_ranges + n_js == 0:
+        return no_leaves
+
+    # One conversion for every date: range starts, range ends, then JS days
+    parts = np.concatenate([range_rows[:, :3], range_rows[:, 3:], js_rows])
+    dates = _dates_from_parts(parts[:, 0], parts[:, 1], parts[:, 2])
+    js_dates = dates[2 * n_ranges:]
+    starts = np.concatenate([dates[:n_ranges], js_dates])
+    ends = np.concatenate([dates[n_ranges:2 * n_ranges], js_dates])
+
+    def two_digits(values):
+        return pd.Series(values).astype(str).str.zfill(2)
+
+    # Label: "DD/MM - DD/MM"
+    range_labels = (two_digits(range_rows[:, 2]) + "/" + two_digits(range_rows[:, 1]) + " - "
+                    + two_digits(range_rows[:, 5]) + "/" + two_digits(range_rows[:, 4])).to_numpy(dtype=object)
+    labels = np.concatenate([range_labels, np.full(n_js, "JS", dtype=object)])
+
+    cell = np.concatenate([range_cells, js_cells])
+    # Per cell, the range comes before its JS days
+    kind = np.concatenate([np.zeros(n_ranges, dtype=np.int64), np.ones(n_js, dtype=np.int64)])
+    sequence = np.concatenate([np.zeros(n_ranges, dtype=np.int64), js_sequence])
+    order = np.lexsort((sequence, kind, cell))
+    source_rows = person_rows[row_pos[cell[order]]]
+
+    leaves = pd.DataFrame({
+        "Name": names[source_rows],
+        "Team": teams[source_rows],
+        "Start": starts[order],
+        "End": ends[order],
+        "Label": labels[order],
+    })
+    return leaves, source_rows
+
+def _process_leave_data_loop(df):
+    """
+    Reference implementation of process_leave_data: walks the sheet row by row
+    and parses every cell with parse_date_range / parse_extra_days.
+    Kept as the ground truth for equivalence checks of the vectorized engine.
     """
     leaves = []
     current_team = "General"
@@ -202,8 +890,7 @@ def process_leave_data(df):
         # Check if col0 contains specific keywords
         if col0:
             name_upper = col0.upper()
-            ignore_list = ["PÉRIODE", "PERIODE", "CONGES", "FORMULAIRE", "INSTRUCTIONS", "SOLDE", "RTT", "ANCIENNETÉ", "PRÉSENCE", "PRESENCE", "RÉFÉRENCE", "REFERENCE", "COMMENTAIRE", "NOTE", "TOTAL", "RESTANT"]
-            if any(ig in name_upper for ig in ignore_list):
+            if any(ig in name_upper for ig in IGNORED_ROW_KEYWORDS):
                 continue
         
         # Check if this row is a Team Header
@@ -225,11 +912,9 @@ def process_leave_data(df):
              # 3. Ignore specific metadata strings
              
              name_upper = col0.upper()
-             keywords = ["SERVICE", "DIRECTION", "PÔLE", "POLE", "ÉQUIPE", "EQUIPE", "DÉPARTEMENT", "DEPARTEMENT", "AGENCE", "BUREAU"]
-             is_keyword_present = any(k in name_upper for k in keywords)
+             is_keyword_present = any(k in name_upper for k in TEAM_KEYWORDS)
              
-             ignore_list = ["PÉRIODE", "PERIODE", "CONGES", "FORMULAIRE", "INSTRUCTIONS", "SOLDE", "RTT", "ANCIENNETÉ"]
-             is_ignored = any(ig in name_upper for ig in ignore_list)
+             is_ignored = any(ig in name_upper for ig in TEAM_IGNORED_KEYWORDS)
              
              # Metric: Must be Uppercase OR contain Keyword. 
              # And MUST NOT be in ignore list.
@@ -287,6 +972,13 @@ def process_leave_data(df):
     if df.empty:
         return df
 
+    return _merge_js_days(df)
+
+def _merge_js_days(df):
+    """
+    Merges consecutive single JS days of the same person into one block
+    labelled "N JS". Non-JS rows are kept first, in their original order.
+    """
     # Logic to merge consecutive JS days
     # Separate JS and non-JS
     df_js = df[df['Label'] == 'JS'].copy()
@@ -343,6 +1035,49 @@ def process_leave_data(df):
 
     return pd.concat([df_other, df_merged_js], ignore_index=True)
 
+def _comparable_values(column):
+    """
+    Array usable for equality tests between rows: category codes for a
+    categorical column (no string materialization), values otherwise.
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy()
+    return column.to_numpy()
+
+def _merge_js_days_vectorized(df):
+    """
+    Vectorized _merge_js_days: after sorting, a JS day starts a new block unless it
+    follows the previous day of the same person; block ids are a cumsum of those
+    breaks and each block keeps its first row, last End and day count.
+    """
+    is_js = (df['Label'] == 'JS').to_numpy()
+    if not is_js.any():
+        return df
+
+    df_other = df[~is_js]
+    df_js = df[is_js].sort_values(by=['Name', 'Team', 'Start'], kind='mergesort')
+
+    names = _comparable_values(df_js['Name'])
+    teams = _comparable_values(df_js['Team'])
+    starts = df_js['Start'].to_numpy()
+    ends = df_js['End'].to_numpy()
+
+    same_person = (names[1:] == names[:-1]) & (teams[1:] == teams[:-1])
+    follows = starts[1:] == ends[:-1] + np.timedelta64(1, 'D')
+    new_block = np.concatenate([[True], ~(same_person & follows)])
+
+    block_ids = np.cumsum(new_block) - 1
+    counts = np.bincount(block_ids)
+    firsts = np.flatnonzero(new_block)
+    lasts = firsts + counts - 1
+
+    merged = df_js.iloc[firsts].reset_index(drop=True)
+    merged['End'] = ends[lasts]
+    labels = pd.Series(counts).astype(str) + " JS"
+    merged['Label'] = labels.where(counts > 1, "JS").to_numpy(dtype=object)
+
+    return pd.concat([df_other, merged], ignore_index=True)
+
 if __name__ == "__main__":
     # Test with local file
     test_file = "new_data.csv"
@@ -0,0 +1,119 @@
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+
+def content_key(data, **options):
+    """
+    Cache key for a pipeline input: SHA-256 of the raw bytes (uploaded file or
+    fetched CSV) plus every option that changes the output.
+    """
+    digest = hashlib.sha256(data)
+    for name in sorted(options):
+        digest.update(f"\0{name}={options[name]!r}".encode("utf-8"))
+    return digest.hexdigest()
+
+def estimate_size(value):
+    """
+    Approximate memory footprint of a cached value, in bytes.
+    """
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    # No frame can exist before pandas is imported: the cache module does not import it
+    pd = sys.modules.get("pandas")
+    if pd is not None and isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if pd is not None and isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    # LeaveStore and NumPy arrays report their own footprint
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+class PipelineCache:
+    """
+    LRU cache with a memory budget for the app pipeline (parsed leaves, PDF and
+    Excel bytes...), shared by every Streamlit session of the server.
+    Least recently used entries are evicted once max_bytes is exceeded; a value
+    larger than the whole budget is returned but not kept.
+    """
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict() # key -> (value, size)
+        self._lock = threading.Lock()
+        self._building = {} # key -> lock held while that entry is computed
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size=None):
+        if size is None:
+            size = estimate_size(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            if size > self.max_bytes:
+                return value
+            self._entries[key] = (value, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+        return value
+
+    def get_or_compute(self, key, compute):
+        """
+        Returns the cached value for key, calling compute() to build it on a miss.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is not sentinel:
+            return value
+        # Computed outside the cache lock, once per key: concurrent requests for
+        # the same entry (double click, other sessions) wait for that build
+        with self._lock:
+            key_lock = self._building.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                with self._lock:
+                    entry = self._entries.get(key)
+                if entry is not None:
+                    return entry[0]
+                return self.put(key, compute())
+        finally:
+            with self._lock:
+                if self._building.get(key) is key_lock:
+                    del self._building[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -1,100 +1,190 @@
-import matplotlib.pyplot as plt
+import hashlib
+import importlib.util
+import io
+import multiprocessing
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
+
 import matplotlib.dates as mdates
 import pandas as pd
 import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.artist import Artist
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+from matplotlib.text import Text
+from colors import assign_colors
+from leave_index import build_leave_index
+from leave_store import leave_date_bounds
+
+# A3 landscape, in inches
+PAGE_SIZE = (16.5, 11.7)
+# Conflict highlights (find_conflicts): outline / hatch color and translucent fill
+CONFLICT_COLOR = '#D32F2F'
+CONFLICT_FILL = (0.83, 0.18, 0.18, 0.25)
+# Screen resolution of the PNG preview (an A3 page is ~1200 px wide instead of 1650 at 100 dpi)
+PREVIEW_DPI = 72
 
-def create_gantt_chart(df_leaves):
+# Everything decided before drawing: the rows of every page and the colors / date range
+# shared by all pages. Plain data, so it can be sent to worker processes.
+ChartLayout = namedtuple("ChartLayout", ["pages", "person_color_map", "team_color_map", "min_date", "max_date"])
+# items: the page rows, Y relative to the page; number: 1-based page number out of count
+ChartPage = namedtuple("ChartPage", ["items", "height", "number", "count"])
+
+def create_gantt_chart(df_leaves, max_rows_per_page=15, index=None, engine="batched", conflicts=None):
     """
     Generates a Gantt chart from the processed leave data.
-    df_leaves should have columns: [Name, Start, End, Label]
+    df_leaves should have columns: [Name, Start, End, Label] (or be a LeaveStore)
+    max_rows_per_page: person + team header rows per A3 page.
+    index: build_leave_index(df_leaves), when the caller already has it.
+    engine: "batched" (default) draws each page with a few collections,
+    "legacy" is the original artist-per-leave drawing (same output).
+    conflicts: find_conflicts(df_leaves, ...), highlighted in red on the chart.
     Returns a Matplotlib Figure object.
+    Every page stays in memory until the caller closes it: iter_gantt_pages and
+    write_gantt_pdf keep a single page alive at a time.
+    """
+    if engine not in ("batched", "legacy"):
+        raise ValueError(f"Unknown engine: {engine}")
+
+    if df_leaves.empty:
+        return _empty_chart()
+
+    return list(iter_gantt_pages(df_leaves, max_rows_per_page=max_rows_per_page, index=index, engine=engine,
+                                 conflicts=conflicts))
+
+def iter_gantt_pages(df_leaves, max_rows_per_page=15, index=None, engine="batched", layout=None, conflicts=None):
+    """
+    Streaming create_gantt_chart: yields the pages one Figure at a time, each one being
+    drawn only when requested. The caller closes each figure once used (write_gantt_pdf does).
+    layout: layout_gantt_chart(df_leaves, ...), when the caller already has it.
+    """
+    if layout is None:
+        if df_leaves.empty:
+            yield _empty_chart()
+            return
+        layout = layout_gantt_chart(df_leaves, max_rows_per_page=max_rows_per_page, index=index,
+                                    conflicts=conflicts)
+    for page in layout.pages:
+        yield render_gantt_page(layout, page, engine=engine)
+
+def write_gantt_pdf(pages, target):
+    """
+    Saves the figures of iter_gantt_pages to target (path, binary file object or an
+    open PdfPages), dropping each one as soon as it is written: peak memory does not
+    grow with the page count.
+    Returns the number of pages written.
+    """
+    # Deferred: only this streaming writer uses the PDF backend's PdfPages
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    if isinstance(target, PdfPages):
+        pdf, owned = target, False
+    else:
+        pdf, owned = PdfPages(target, metadata={"CreationDate": None}), True
+    count = 0
+    try:
+        for fig in pages:
+            pdf.savefig(fig, bbox_inches='tight')
+            count += 1
+    finally:
+        if owned:
+            pdf.close()
+    return count
+
+def render_gantt_preview(layout, page_number=1, dpi=PREVIEW_DPI, engine="batched"):
+    """
+    PNG bytes of a single page of a layout_gantt_chart layout (page_number starts at 1)
+    at screen resolution, for the on-screen preview: no other page is drawn.
+    """
+    if not layout.pages:
+        fig = _empty_chart()
+    else:
+        page_number = min(max(page_number, 1), len(layout.pages))
+        fig = render_gantt_page(layout, layout.pages[page_number - 1], engine=engine)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi, bbox_inches='tight')
+    return buffer.getvalue()
+
+def create_gantt_preview(df_leaves, max_rows_per_page=15, index=None, engine="batched"):
+    """
+    First page of the chart only, for on-screen previews: the pagination is computed
+    but no other page is drawn.
+    Returns a Matplotlib Figure.
     """
     if df_leaves.empty:
-        fig, ax = plt.subplots(figsize=(10, 2))
-        ax.text(0.5, 0.5, "No leave data found.", ha='center', va='center')
-        ax.set_axis_off()
-        return fig
+        return _empty_chart()
+    layout = layout_gantt_chart(df_leaves, max_rows_per_page=max_rows_per_page, index=index)
+    return render_gantt_page(layout, layout.pages[0], engine=engine)
+
+def _new_figure(figsize):
+    """
+    Figure with its own Agg canvas and a single Axes, like plt.subplots but outside
+    pyplot: no global figure manager shared by the threads of concurrent sessions,
+    and nothing to close (the figure is freed with its last reference).
+    """
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig, fig.subplots()
 
-    # Ensure Team column exists (backwards compatibility)
+def _empty_chart():
+    fig, ax = _new_figure((10, 2))
+    ax.text(0.5, 0.5, "No leave data found.", ha='center', va='center')
+    ax.set_axis_off()
+    return fig
+
+def layout_gantt_chart(df_leaves, max_rows_per_page=15, index=None, conflicts=None):
+    """
+    First half of create_gantt_chart: colors, date range and pagination, without drawing.
+    conflicts: find_conflicts(df_leaves, ...): the understaffed intervals of a team go
+    on its header row ('understaffed') and the overlapping days of a person on their
+    row ('overlaps'), as (first day, last day) pairs.
+    Returns a ChartLayout whose pages are drawn by render_gantt_page.
+    """
+    # Ensure Team column exists (backwards compatibility; a LeaveStore always has one)
     if 'Team' not in df_leaves.columns:
         df_leaves['Team'] = 'General'
 
-    # Get unique teams in order of appearance
-    teams = df_leaves['Team'].unique()
-    
-    # Calculate layout
-    # We need a list of (y, name, team) tuples to plotting
-    # We will build this starting from top (y=max) to bottom (y=0) OR
-    # Just list them and then map to Y coordinates.
-    # Leaving space between teams.
-    
-    plot_items = [] # List of dicts: {'Name': name, 'Team': team, 'Leaves': [rows]}
-    
-    # Group by Team and Name to handle multiple rows per person
-    # But usually one person has multiple leaves in one row or multiple rows.
-    # The parser produces one row per leave interval.
-    # We want one Y-line per Person.
-    
-    for team in teams:
-        team_data = df_leaves[df_leaves['Team'] == team]
-        # Get unique people in this team, maintain order
-        people = team_data['Name'].unique()
-        
-        for person in people:
-            person_leaves = team_data[team_data['Name'] == person]
-            plot_items.append({
-                'Name': person,
-                'Team': team,
-                'Leaves': person_leaves
-            })
-        
-        # Add a spacing/separator item after each team
-        # We handle this by adding extra Y decrement in the loop below
-    
-    # Variables for plotting
-    current_y = len(plot_items) + len(teams) # Start from top
-    # COMPACT: Bar height matched to spacing (0.6 spacing -> 0.6 bar to fill)
-    bar_height = 0.6
-    
-    # Colors logic moved to colors.py 
-    
-    # Track Y positions for labels
-    y_ticks = []
-    y_labels = []
-    
-    # Track Team Y positions for separators/titles
-    last_team = None
-    
-    # We iterate through plot_items (Person level)
-    # But we need to insert Team headers.
-    
-    # Let's iterate by Team again to control flow better
-    current_y = 0 # We'll start from 0 at top (inverted later) or just use negative?
-    # Let's stick to positive Y, but we need to know max Y.
-    # Easiest is to construct the list bottom-up or top-down.
-    # Let's go Top-Down: Y = 0 is top line? No, Y usually increases upwards.
-    # So Name 1 is at Y=Max.
-    
-    # Calculate min/max dates for axis limits and positioning
+    # Teams -> people -> leaves sorted by Start, grouped once and reused by
+    # the layout, the pagination and the drawing below
+    if index is None:
+        index = build_leave_index(df_leaves)
+
     # Colors
-    from colors import assign_colors
-    person_color_map, team_color_map = assign_colors(df_leaves)
+    person_color_map, team_color_map = assign_colors(df_leaves, index=index)
     
     # Calculate min/max dates for axis limits and positioning
-    min_date = df_leaves['Start'].min() - pd.DateOffset(months=1)
-    max_date = df_leaves['End'].max() + pd.DateOffset(months=1)
+    min_date, max_date = leave_date_bounds(df_leaves)
+    min_date -= pd.DateOffset(months=1)
+    max_date += pd.DateOffset(months=1)
     
+    understaffed, overlaps = {}, {}
+    if conflicts is not None:
+        for interval in conflicts.understaffed:
+            understaffed.setdefault(interval.team, []).append((interval.start, interval.end))
+        for overlap in conflicts.overlaps:
+            overlaps.setdefault((overlap.name, overlap.team), []).append((overlap.start, overlap.end))
+
     # We detemine Y-coords
+    # Y increases upwards, so the layout is built bottom-up from the last team
     layout = [] # (y, type, label, data)
     y_cursor = 0
     
-    for team in teams[::-1]:
-        team_data = df_leaves[df_leaves['Team'] == team]
-        people = team_data['Name'].unique()[::-1] # Reverse people too
+    for team_leaves in index[::-1]:
+        team = team_leaves.team
         
-        # Add people
-        for person in people:
-            layout.append({'y': y_cursor, 'type': 'person', 'name': person, 'team': team})
+        # Add people (reversed too)
+        for person_leaves in team_leaves.people[::-1]:
+            item = {'y': y_cursor, 'type': 'person', 'name': person_leaves.name, 'team': team,
+                    'leaves': person_leaves}
+            if (person_leaves.name, team) in overlaps:
+                item['overlaps'] = overlaps[(person_leaves.name, team)]
+            layout.append(item)
             # COMPACT: Reduced from 1.0 to 0.6
             y_cursor += 0.6
             
@@ -102,7 +192,10 @@ def create_gantt_chart(df_leaves):
         # Remove extra buffer for perfect stacking
         # y_cursor += 0.1 
         
-        layout.append({'y': y_cursor, 'type': 'header', 'name': team, 'team': team})
+        item = {'y': y_cursor, 'type': 'header', 'name': team, 'team': team}
+        if team in understaffed:
+            item['understaffed'] = understaffed[team]
+        layout.append(item)
         # COMPACT: 0.6 spacing for header (height 0.6)
         y_cursor += 0.6
         
@@ -113,7 +206,7 @@ def create_gantt_chart(df_leaves):
     # Row height is 0.6.
     # Approx 12-13 rows per page (people + headers) safely.
     
-    # We need to chunk plot_items (which are per person) but respect Team headers.
+    # We need to chunk the person rows but respect Team headers.
     # Or simpler: Just iterate through layout items and break when Y exceeds limit?
     # but we are building Bottom-Up or Top-Down?
     # Current logic:
@@ -126,8 +219,8 @@ def create_gantt_chart(df_leaves):
     # Or better: Create separate figures for chunks of people.
     
     # Let's chunk the data first.
-    max_rows_per_page = 15 # Conservative for A3
-    
+    # max_rows_per_page defaults to 15, conservative for A3
+
     # Break layout items into pages
     pages = []
     current_page_items = []
@@ -152,7 +245,7 @@ def create_gantt_chart(df_leaves):
     # Reverse pages to have the "Top" of the chart (Last teams added) as the first page
     pages.reverse()
         
-    figures = []
+    chart_pages = []
     
     for i, page_items in enumerate(pages):
         # Calculate height for this page
@@ -180,104 +273,372 @@ def create_gantt_chart(df_leaves):
                  # Here we just stack them.
                  page_y_cursor += 0.6
         
-        # Fixed A3 Size: 16.5 x 11.7 inches
-        # We can stick to dynamic height or force A3?
-        # User asked for A3.
-        fig_height = 11.7
-        fig_width = 16.5
-        
-        fig, ax = plt.subplots(figsize=(fig_width, fig_height))
+        chart_pages.append(ChartPage(page_layout, page_y_cursor, i + 1, len(pages)))
         
-        # Plotting Logic (Same as before but using page_layout)
-        ax.set_ylim(-1, max(page_y_cursor, 5)) # Min height to avoid error
-        
-        y_ticks = []
-        y_labels = []
+    return ChartLayout(chart_pages, person_color_map, team_color_map, min_date, max_date)
+
+def render_gantt_page(layout, page, engine="batched"):
+    """
+    Draws one page of a layout_gantt_chart layout (an item of layout.pages).
+    Returns a Matplotlib Figure.
+    """
+    if engine not in ("batched", "legacy"):
+        raise ValueError(f"Unknown engine: {engine}")
+
+    person_color_map, team_color_map = layout.person_color_map, layout.team_color_map
+    min_date, max_date = layout.min_date, layout.max_date
+    # COMPACT: Bar height matched to spacing (0.6 spacing -> 0.6 bar to fill)
+    bar_height = 0.6
+    
+    # Fixed A3 Size: 16.5 x 11.7 inches
+    # We can stick to dynamic height or force A3?
+    # User asked for A3.
+    fig, ax = _new_figure(PAGE_SIZE)
+    
+    # Plotting Logic (Same as before but using page_layout)
+    ax.set_ylim(-1, max(page.height, 5)) # Min height to avoid error
+    
+    draw_page = _draw_page_batched if engine == "batched" else _draw_page_legacy
+    y_ticks, y_labels = draw_page(ax, page.items, person_color_map, team_color_map,
+                                  min_date, max_date, bar_height)
+    _draw_conflicts(ax, page.items, bar_height)
+
+    # Axis Settings
+    ax.set_yticks(y_ticks)
+    ax.set_yticklabels(y_labels, fontsize=9, fontweight='bold', color='#2D2D3A')
+    ax.tick_params(axis='y', length=0)
+    ax.set_xlim(mdates.date2num(min_date), mdates.date2num(max_date))
+    ax.xaxis.set_major_locator(mdates.MonthLocator())
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%b %Y'))
+    ax.grid(True, axis='x', linestyle='--', alpha=0.5)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['left'].set_visible(True) 
+    ax.spines['left'].set_linewidth(1.0)
+    ax.spines['left'].set_color('black')
+    
+    # Title with Page Number
+    current_year = min_date.year
+    next_year = max_date.year
+    page_str = f" - Page {page.number}/{page.count}" if page.count > 1 else ""
+    ax.set_title(f"Calendrier des Congés {current_year} - {next_year}{page_str}", pad=20)
+    
+    fig.tight_layout()
+    return fig
+
+def page_fingerprint(layout, page):
+    """
+    Digest of everything a page of a layout_gantt_chart layout is drawn from: its
+    rows, their leaves, colors and conflicts, the date range and the page number.
+    A page with the same fingerprint in a later layout (a sheet uploaded again with
+    a few cells edited) draws exactly the same, and need not be drawn again.
+    """
+    digest = hashlib.sha256(repr((layout.min_date, layout.max_date, page.height, page.number, page.count)).encode())
+    for item in page.items:
+        if item['type'] == 'person':
+            color = layout.person_color_map.get((item['name'], item['team']))
+        else:
+            color = layout.team_color_map.get(item['name'])
+        digest.update(repr((item['type'], item['name'], item['team'], item['y'], color,
+                            item.get('understaffed'), item.get('overlaps'))).encode())
+        leaves = item.get('leaves')
+        if leaves is not None:
+            digest.update(leaves.starts.tobytes())
+            digest.update(leaves.ends.tobytes())
+            digest.update(repr(leaves.labels.tolist()).encode())
+    return digest.hexdigest()
 
-        for item in page_layout:
-            y = item['y']
+# Below this many pages to draw, sending them to worker processes costs more than it saves
+PARALLEL_MIN_PAGES = 4
+
+_page_pools = {}
+_page_pools_lock = threading.Lock()
+
+def render_gantt_pdf(layout, engine="batched", workers=None, start_method="spawn", rendered=None):
+    """
+    Renders every page of a layout_gantt_chart layout into one PDF document, returned as bytes.
+    Each worker process gets one page, draws it to a single-page PDF, and the pages
+    are merged in order with pypdf: the bytes only depend on the layout, whatever
+    the worker count or the order in which pages finish.
+    workers: process count (default: one per available CPU, 1 renders in this process).
+    The worker processes are started once and kept for the next builds; fewer than
+    PARALLEL_MIN_PAGES pages to draw are rendered in this process.
+    rendered: {page_fingerprint: single-page PDF} of pages already drawn (by the same
+    engine), reused instead of drawing them again; the pages drawn here are added to it.
+    Without pypdf, pages are streamed here one after another through write_gantt_pdf.
+    """
+    if not layout.pages:
+        return _figure_pdf(_empty_chart())
+
+    if importlib.util.find_spec("pypdf") is None:
+        buffer = io.BytesIO()
+        write_gantt_pdf(iter_gantt_pages(None, layout=layout, engine=engine), buffer)
+        return buffer.getvalue()
+
+    if rendered is None:
+        rendered = {}
+    fingerprints = [page_fingerprint(layout, page) for page in layout.pages]
+    missing = {fingerprint: page for page, fingerprint in zip(layout.pages, fingerprints) if fingerprint not in rendered}
+
+    # More processes than CPUs only adds start-up and transfer time
+    workers = max(1, min(workers or _available_cpus(), _available_cpus()))
+
+    # Workers only receive their own page, not the whole chart
+    shared = layout._replace(pages=None)
+    if workers == 1 or len(missing) < PARALLEL_MIN_PAGES:
+        missing_pdfs = [_render_page_pdf(shared, page, engine) for page in missing.values()]
+    else:
+        executor = _page_pool(workers, start_method)
+        try:
+            # map keeps the page order whatever the completion order
+            missing_pdfs = list(executor.map(_render_page_pdf, repeat(shared), missing.values(), repeat(engine)))
+        except BrokenProcessPool:
+            # A worker died (killed, out of memory): the next build starts a new pool
+            with _page_pools_lock:
+                if _page_pools.get((workers, start_method)) is executor:
+                    del _page_pools[workers, start_method]
+            raise
+    rendered.update(zip(missing, missing_pdfs))
+    page_pdfs = [rendered[fingerprint] for fingerprint in fingerprints]
+
+    from pypdf import PdfReader, PdfWriter
+    writer = PdfWriter()
+    for page_pdf in page_pdfs:
+        writer.append(PdfReader(io.BytesIO(page_pdf)))
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+def _available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+def _page_pool(workers, start_method):
+    """
+    Process-wide pool of PDF page workers, started on first use and shared by every build.
+    """
+    with _page_pools_lock:
+        executor = _page_pools.get((workers, start_method))
+        if executor is None:
+            context = multiprocessing.get_context(start_method)
+            executor = _page_pools[workers, start_method] = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        return executor
+
+def _render_page_pdf(layout, page, engine):
+    # Runs in the worker processes
+    return _figure_pdf(render_gantt_page(layout, page, engine=engine))
+
+def _figure_pdf(fig):
+    """
+    Single-page PDF bytes of a figure.
+    No creation date, so that the same page always gives the same bytes.
+    """
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="pdf", bbox_inches='tight', metadata={"CreationDate": None})
+    return buffer.getvalue()
+
+def _draw_page_legacy(ax, page_layout, person_color_map, team_color_map, min_date, max_date, bar_height):
+    """
+    Original page drawing: one broken_barh and one text per leave, one axhline per row.
+    Kept as the reference for the batched engine.
+    Returns (y_ticks, y_labels).
+    """
+    y_ticks = []
+    y_labels = []
+
+    for item in page_layout:
+        y = item['y']
+        
+        if item['type'] == 'person':
+            person = item['name']
+            team = item['team']
             
-            if item['type'] == 'person':
-                person = item['name']
-                team = item['team']
-                
-                # Get leaves
-                leaves = df_leaves[(df_leaves['Name'] == person) & (df_leaves['Team'] == team)].sort_values('Start')
-                
-                # ... [Insert Overlap Logic Here] ...
-                # To keep code simple, I will reuse the overlap logic block
-                
-                last_mid_point = -999 
-                last_y_offset = 0.1
+            # Leaves of this person, already sorted by Start
+            leaves = item['leaves']
+            start_nums = mdates.date2num(leaves.starts)
+            durations = (leaves.ends - leaves.starts) // np.timedelta64(1, 'D') + 1
+            
+            last_mid_point = -999 
+            last_y_offset = 0.1
+            
+            for start_num, duration, label in zip(start_nums.tolist(), durations.tolist(), leaves.labels):
+                mid_point = start_num + duration / 2
                 
-                for _, split_row in leaves.iterrows():
-                    start = split_row['Start']
-                    end = split_row['End']
-                    label = split_row['Label']
-                    duration = (end - start).days + 1
-                    start_num = mdates.date2num(start)
-                    mid_point = start_num + duration / 2
-                    
-                    proximity_threshold = 20
+                proximity_threshold = 20
+                y_offset = 0
+                if (mid_point - last_mid_point) < proximity_threshold:
+                    if last_y_offset > 0: y_offset = -0.15
+                    else: y_offset = 0.15
+                else:
                     y_offset = 0
-                    if (mid_point - last_mid_point) < proximity_threshold:
-                        if last_y_offset > 0: y_offset = -0.15
-                        else: y_offset = 0.15
-                    else:
-                        y_offset = 0
-                    
-                    last_mid_point = mid_point
-                    last_y_offset = y_offset
-                    
-                    ax.broken_barh([(start_num, duration)], (y - bar_height/2, bar_height),
-                                   facecolors=person_color_map.get((person, team), '#cccccc'), edgecolor='none')
-                    ax.text(mid_point, y + y_offset, label,
-                            ha='center', va='center', fontsize=6, color='black')
-                
-                y_ticks.append(y)
-                y_labels.append(f"{person}")
-                ax.axhline(y=y - 0.3, color='#eeeeee', linestyle='-', linewidth=0.5)
                 
-            elif item['type'] == 'header':
-                xmin, xmax = mdates.date2num(min_date), mdates.date2num(max_date)
-                h_band = 0.6
-                y_bottom = y - h_band / 2
-                y_top = y + h_band / 2
+                last_mid_point = mid_point
+                last_y_offset = y_offset
                 
-                rect = plt.Rectangle((xmin, y_bottom), xmax - xmin, h_band, 
-                                   facecolor=team_color_map.get(item['name'], '#E8E6F0'), edgecolor='none', zorder=0)
-                ax.add_patch(rect)
-                ax.axhline(y=y_bottom, xmin=0, xmax=1, color='black', linewidth=1.0)
-                ax.axhline(y=y_top, xmin=0, xmax=1, color='black', linewidth=1.0)
-                
-                text_x = xmin + (xmax - xmin) * 0.02
-                ax.text(text_x, y, item['name'], ha='left', va='center', 
-                        fontsize=10, fontweight='bold', color='#333344', zorder=1)
-
-        # Axis Settings
-        ax.set_yticks(y_ticks)
-        ax.set_yticklabels(y_labels, fontsize=9, fontweight='bold', color='#2D2D3A')
-        ax.tick_params(axis='y', length=0)
-        ax.set_xlim(mdates.date2num(min_date), mdates.date2num(max_date))
-        ax.xaxis.set_major_locator(mdates.MonthLocator())
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%b %Y'))
-        ax.grid(True, axis='x', linestyle='--', alpha=0.5)
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        ax.spines['left'].set_visible(True) 
-        ax.spines['left'].set_linewidth(1.0)
-        ax.spines['left'].set_color('black')
-        
-        # Title with Page Number
-        current_year = min_date.year
-        next_year = max_date.year
-        page_str = f" - Page {i+1}/{len(pages)}" if len(pages) > 1 else ""
-        ax.set_title(f"Calendrier des Congés {current_year} - {next_year}{page_str}", pad=20)
-        
-        plt.tight_layout()
-        figures.append(fig)
-        
-    return figures
+                ax.broken_barh([(start_num, duration)], (y - bar_height/2, bar_height),
+                               facecolors=person_color_map.get((person, team), '#cccccc'), edgecolor='none')
+                ax.text(mid_point, y + y_offset, label,
+                        ha='center', va='center', fontsize=6, color='black')
+            
+            y_ticks.append(y)
+            y_labels.append(f"{person}")
+            ax.axhline(y=y - 0.3, color='#eeeeee', linestyle='-', linewidth=0.5)
+            
+        elif item['type'] == 'header':
+            xmin, xmax = mdates.date2num(min_date), mdates.date2num(max_date)
+            h_band = 0.6
+            y_bottom = y - h_band / 2
+            y_top = y + h_band / 2
+            
+            rect = Rectangle((xmin, y_bottom), xmax - xmin, h_band, 
+                               facecolor=team_color_map.get(item['name'], '#E8E6F0'), edgecolor='none', zorder=0)
+            ax.add_patch(rect)
+            ax.axhline(y=y_bottom, xmin=0, xmax=1, color='black', linewidth=1.0)
+            ax.axhline(y=y_top, xmin=0, xmax=1, color='black', linewidth=1.0)
+            
+            text_x = xmin + (xmax - xmin) * 0.02
+            ax.text(text_x, y, item['name'], ha='left', va='center', 
+                    fontsize=10, fontweight='bold', color='#333344', zorder=1)
+
+    return y_ticks, y_labels
+
+def _draw_page_batched(ax, page_layout, person_color_map, team_color_map, min_date, max_date, bar_height):
+    """
+    Same page as _draw_page_legacy with a handful of artists: every leave bar of the page
+    in one PolyCollection (per-leave facecolors), every row separator / team line in
+    one LineCollection and every label in one _LabelCollection, drawn in the same order.
+    Returns (y_ticks, y_labels).
+    """
+    y_ticks = []
+    y_labels = []
+    bars = []
+    bar_colors = []
+    label_positions = []
+    label_texts = []
+    # Separators and team lines share one collection: overlapping ones keep the legacy stacking
+    segments = []
+    line_colors = []
+    line_widths = []
+    xmin, xmax = mdates.date2num(min_date), mdates.date2num(max_date)
+
+    for item in page_layout:
+        y = item['y']
+
+        if item['type'] == 'person':
+            person = item['name']
+            team = item['team']
+            leaves = item['leaves']
+            color = person_color_map.get((person, team), '#cccccc')
+
+            start_nums = mdates.date2num(leaves.starts)
+            durations = (leaves.ends - leaves.starts) // np.timedelta64(1, 'D') + 1
+            # Same rectangles as broken_barh: (x0, y0), (x0, y1), (x1, y1), (x1, y0)
+            y0, y1 = y - bar_height / 2, y - bar_height / 2 + bar_height
+            for start_num, end_num in zip(start_nums.tolist(), (start_nums + durations).tolist()):
+                bars.append(((start_num, y0), (start_num, y1), (end_num, y1), (end_num, y0)))
+            bar_colors.extend([color] * len(start_nums))
+
+            # Alternate labels up / down when the previous one is too close
+            last_mid_point = -999
+            last_y_offset = 0.1
+            for start_num, duration, label in zip(start_nums.tolist(), durations.tolist(), leaves.labels):
+                mid_point = start_num + duration / 2
+                if (mid_point - last_mid_point) < 20:
+                    y_offset = -0.15 if last_y_offset > 0 else 0.15
+                else:
+                    y_offset = 0
+                last_mid_point = mid_point
+                last_y_offset = y_offset
+
+                label_positions.append((mid_point, y + y_offset))
+                label_texts.append(label)
+
+            y_ticks.append(y)
+            y_labels.append(f"{person}")
+            segments.append(((0, y - 0.3), (1, y - 0.3)))
+            line_colors.append('#eeeeee')
+            line_widths.append(0.5)
+
+        elif item['type'] == 'header':
+            h_band = 0.6
+            y_bottom = y - h_band / 2
+            y_top = y + h_band / 2
+
+            rect = Rectangle((xmin, y_bottom), xmax - xmin, h_band,
+                             facecolor=team_color_map.get(item['name'], '#E8E6F0'), edgecolor='none', zorder=0)
+            ax.add_patch(rect)
+            segments.extend([((0, y_bottom), (1, y_bottom)), ((0, y_top), (1, y_top))])
+            line_colors.extend(['black', 'black'])
+            line_widths.extend([1.0, 1.0])
+
+            text_x = xmin + (xmax - xmin) * 0.02
+            ax.text(text_x, y, item['name'], ha='left', va='center',
+                    fontsize=10, fontweight='bold', color='#333344', zorder=1)
+
+    if bars:
+        ax.add_collection(PolyCollection(np.array(bars), facecolors=bar_colors, edgecolor='none'))
+    if segments:
+        # Like axhline: x in axes coordinates (full width), y in data coordinates
+        ax.add_collection(LineCollection(segments, colors=line_colors, linewidths=line_widths,
+                                         linestyles='solid', transform=ax.get_yaxis_transform(), zorder=2),
+                          autolim=False)
+    if label_texts:
+        ax.add_artist(_LabelCollection(ax, label_positions, label_texts,
+                                       ha='center', va='center', fontsize=6, color='black'))
+
+    return y_ticks, y_labels
+
+def _draw_conflicts(ax, page_layout, bar_height):
+    """
+    Conflicts of the page items (see layout_gantt_chart), over either engine's
+    drawing: understaffed days hatched in red on the team header, overlapping days
+    of a person outlined in red on their row.
+    """
+    understaffed, overlaps = [], []
+    for item in page_layout:
+        y0, y1 = item['y'] - bar_height / 2, item['y'] + bar_height / 2
+        for key, boxes in (('understaffed', understaffed), ('overlaps', overlaps)):
+            for first, last in item.get(key, ()):
+                x0 = mdates.date2num(first)
+                x1 = mdates.date2num(last) + 1
+                boxes.append(((x0, y0), (x0, y1), (x1, y1), (x1, y0)))
+    if understaffed:
+        ax.add_collection(PolyCollection(np.array(understaffed), facecolors=CONFLICT_FILL,
+                                         edgecolors=CONFLICT_COLOR, hatch='////', linewidths=0.8, zorder=1.5))
+    if overlaps:
+        ax.add_collection(PolyCollection(np.array(overlaps), facecolors='none',
+                                         edgecolors=CONFLICT_COLOR, linewidths=1.2, zorder=2.5))
+
+class _LabelCollection(Artist):
+    """
+    Every leave label of a page as a single artist: one Text is moved and redrawn for
+    each label, so the layout and the output are exactly those of ax.text, without
+    a Text artist per leave to create, track and lay out.
+    Labels sit inside the plot area and are left out of the tight layout computations.
+    """
+    def __init__(self, ax, positions, labels, **text_kwargs):
+        super().__init__()
+        self._positions = positions
+        self._labels = labels
+        # Same setup as ax.text: data coordinates, clipped by the axes patch
+        self._text = Text(0, 0, "", transform=ax.transData, **text_kwargs)
+        self._text.set_clip_path(ax.patch)
+        self.set_zorder(self._text.get_zorder())
+        self.set_in_layout(False)
+
+    def set_figure(self, fig):
+        super().set_figure(fig)
+        self._text.set_figure(fig)
+
+    def draw(self, renderer):
+        if not self.get_visible():
+            return
+        for (x, y), label in zip(self._positions, self._labels):
+            self._text.set_position((x, y))
+            self._text.set_text(label)
+            self._text.draw(renderer)
+        self.stale = False
 
 if __name__ == "__main__":
     # Test stub